@@ -1,24 +1,121 @@
+import argparse
+import os
 import sys
+import time
 from pprint import pprint
-from parser import Parser
-from code import Code
+from incremental import Program
+from lexer import read_chunks
+from machine import Machine
+from mesh import Exhausted, Limits, Mesh
+from parallel import Scheduler
+from profiler import Profile
+import snapshot
+import stdlib
 from writer import Writer
 
-if not len(sys.argv) - 1:
-	exit('usage: nylo file.ny')
-	
-this, target = sys.argv
+arguments = argparse.ArgumentParser(prog='nylo')
+arguments.add_argument('target', metavar='file.ny')
+arguments.add_argument('--watch', action='store_true',
+	help='run the file again every time it changes')
+arguments.add_argument('--memo', type=int, default=Mesh.memo, metavar='CALLS',
+	help='how many calls to remember the value of, 0 for none')
+arguments.add_argument('--collect', type=int, default=Mesh.threshold,
+	metavar='VALUES', help='how many values can be added before the ones '
+	'that are not used anymore are removed')
+arguments.add_argument('--interpret', action='store_true',
+	help='clone every call, without compiling the definitions')
+arguments.add_argument('--jobs', type=int, default=1, metavar='PROCESSES',
+	help='how many processes can evaluate the calls of the file together')
+arguments.add_argument('--snapshot', metavar='FILE.nys',
+	help='save the evaluated mesh to a snapshot, to look up its values later')
+arguments.add_argument('--steps', type=int, metavar='STEPS',
+	help='how many values can be looked for and calls made at most')
+arguments.add_argument('--size', type=int, metavar='KEYS',
+	help='how many keys the mesh can have at most')
+arguments.add_argument('--timeout', type=float, metavar='SECONDS',
+	help='how many seconds the evaluation can take at most')
+arguments.add_argument('--profile', action='store_true',
+	help='write how long each phase takes and what is done for each '
+	'definition to stderr, without --watch')
+arguments.add_argument('--profile-format', default='table',
+	choices=('table', 'json'), help='how to write the profile')
+args = arguments.parse_args()
+Mesh.memo = args.memo
+Mesh.threshold = args.collect
+
+target = args.target
 name = target.partition('/')[2].partition('.')[0]
 
-std_parser = Parser(Code('('+open('std/base.ny', 'r').read()+')'))
-std_parser.parse(('base',))
+profile = Profile()
+with profile.phase('std'):
+	std = stdlib.load()
+# A file named like a definition of the standard library, like
+# len.ny, is parsed next to it instead, see stdlib.program
+while stdlib.used(('base', name), std):
+	name += '_'
+# What's written and the standard library are never removed
+roots = {('base', name, 'self')} | {key[:2] for key in std if len(key) > 1}
+
+if args.watch:
+	program = Program(('base', name), std)
+	modified = None
+	while True:
+		if modified != os.stat(target).st_mtime:
+			modified = os.stat(target).st_mtime
+			with open(target, 'r') as file:
+				code = file.read()
+			try:
+				program.update(code)
+				mesh = Mesh(program.mesh)
+				mesh.roots = roots
+				if not args.interpret:
+					mesh.machine = Machine(program.mesh)
+				mesh.limits = Limits(args.steps, args.size, args.timeout)
+				if args.jobs > 1:
+					mesh.scheduler = Scheduler(mesh, ('base', name), args.jobs)
+					mesh.scheduler.run()
+				print(Writer(mesh).write(('base', name, 'self')))
+				if mesh.scheduler:
+					mesh.scheduler.close()
+			except (SystemExit, SyntaxError, ValueError, Exhausted) as error:
+				if not isinstance(error, SystemExit):
+					print(f'Error: {error}')
+		time.sleep(0.2)
+
+def report():
+	"Writes the profile, if it's been asked for."
+	if not args.profile:
+		return
+	if args.profile_format == 'table':
+		print(profile.table(), file=sys.stderr)
+	else:
+		print(profile.json(), file=sys.stderr)
 
-parser = Parser(Code('('+open(target, 'r').read()+')'))
-parser.parse(('base', name,))
-parser.mesh.update(std_parser.mesh)
-parser.mesh.bind()
-writer = Writer(parser.mesh)
+with open(target, 'r') as file:
+	mesh = stdlib.program(read_chunks(file), ('base', name), std,
+						  profile.phase)
+mesh.roots = roots
+if not args.interpret:
+	with profile.phase('compile'):
+		mesh.machine = Machine(mesh)
+mesh.limits = Limits(args.steps, args.size, args.timeout)
+if args.profile:
+	mesh.profile = profile
+writer = Writer(mesh)
 
-#print("size in >", len(parser.mesh), sys.getsizeof(parser.mesh)/1000)
-print(writer.write(('base', name, 'self')))
-#print("size out <", len(parser.mesh), sys.getsizeof(parser.mesh)/1000)
+try:
+	if args.jobs > 1:
+		with profile.phase('schedule'):
+			mesh.scheduler = Scheduler(mesh, ('base', name), args.jobs)
+			mesh.scheduler.run()
+	with profile.phase('write'):
+		print(writer.write(('base', name, 'self')))
+	if mesh.scheduler:
+		mesh.scheduler.close()
+	if args.snapshot:
+		with profile.phase('snapshot'):
+			snapshot.dump(mesh, args.snapshot, ('base', name))
+except Exhausted as error:
+	report()
+	sys.exit(f'Error: {error}')
+report()
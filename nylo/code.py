@@ -1,213 +1,210 @@
 """
 This is a class that aims to make parsing a little bit easier.
 It creates an abstraction layer between the parser and the
-code string itself. This class will provide methods to
-get characters from code, automatically removing whitespace,
+code itself. This class will provide methods to get tokens
+from code, that the lexer module splits ignoring whitespace,
 and checking if there's anything wrong (Wrong syntax or
 EOF while parsing)
 """
 
-import string
-from typing import List
+import re
+from array import array
+from bisect import bisect
+from itertools import chain
+from typing import Iterable, Optional, Tuple, Union
+from lexer import tokenize, Token, EOF
 from fuck import unexpected
 
 class Code:
 	"""
-	Abstraction layer between parsers and code string.
-	The code is stored as a list of characters to make removing
-	parsed characters easier.
-	Every time a character is parsed, it will be removed from
-	the list of characters. In this way, the character that's being
-	parsed, or 'current character', is always the first one.
-	This class implements methods to check what's the current character,
-	and to parse a character (that removes it from the list).
-	This class also implements method to get charaters until a
-	certain one (e.g.: parse until the character is ").
-	Whitespace is always ignored, except in "parse until [x]"
-	methods, as spaces should be parsed in strings.
+	Abstraction layer between parsers and code.
+	The code is given either as a string, or as an iterable of
+	chunks of code (e.g. a file read with lexer.read_chunks), and it
+	is split into tokens by the lexer while it's being parsed.
+	Only the token that's being parsed, or 'current token', is kept,
+	and every time a token is parsed the next one is read.
+	This class implements methods to check what's the kind of the
+	current token, and to parse a token (that moves to the next one).
+	The kinds are the ones defined in the lexer module, e.g. IDENT,
+	NAT or OP, or the character itself for punctuation, e.g. '('.
 	"""
-	
+
 	# Public
-	
-	def __init__(self, code: str, consumed=''):
+
+	def __init__(self, code: Union[str, Iterable[str]]):
 		"Creates a new instance"
-		self.code: List[str] = [*code]
-		self.consumed = [*consumed]
-		# Already remove trailing whitespace
-		self.whitespace()
-		
-	def skip(self, characters: str) -> str:
+		if isinstance(code, str):
+			code = (code,)
+		# The offsets of all the newlines read so far, and the code
+		# read from the beginning of the current line, for errors
+		self.newlines = array('q')
+		self.read: int = 0
+		self.line_code: str = ''
+		self.line_start: int = 0
+		self.token: Optional[Token] = None
+		self.tokens = tokenize(self.record(code))
+		self.token = next(self.tokens)
+
+	@property
+	def index(self) -> int:
 		"""
-		This method skips the current character by
-		removing it from the list of characters.
-		It will also assume the current characters is
-		within the given characters.
-		It will also return the parsed character.
-		
-		>>> abc = Code('abc')
-		
-		The first current character is 'a', which is
-		inside the string 'a', so it is removed and returned.
-		>>> abc.skip('a')
+		The offset of the current token in the code.
+
+		>>> abc = Code('  abc  (')
+		>>> abc.index
+		2
+		>>> abc.skip('IDENT')
+		'abc'
+		>>> abc.index
+		7
+		"""
+		return self.token.start
+
+	def line(self, index: int) -> Tuple[int, int, str]:
+		"""
+		This method finds where the given offset is in the
+		code. It returns the number of the line, starting from
+		1, the column, starting from 0, and the code of the
+		whole line. Only the line of the current token is
+		available, as the previous ones are not kept.
+		
+		>>> abc = Code(['a\\n  bc', ' d\\ne'])
+		>>> abc.line(0)
+		(1, 0, 'a')
+		>>> abc.skip('IDENT')
 		'a'
-		
-		The next current character is 'b', which
-		is in 'bc', so it will be returned.
-		>>> abc.skip('bc')
-		'b'
-		
-		The next current character is 'c', which
-		is not in 'ab', so an exception will be raised.
-		>>> abc.skip('ab')
-		Traceback (most recent call last):
-			...
-		SystemExit
-		
-		'c' has not be removed, so it's still in the code.
-		>>> abc.code
-		['c']
-		
-		Trying to skip a character from an empty code will also
-		raise an exception.
-		>>> Code.skip(Code(''), 'abc')
-		Traceback (most recent call last):
-			...
-		SystemExit
+		>>> abc.line(abc.index)
+		(2, 2, '  bc d')
+		>>> abc.skip('IDENT')
+		'bc'
+		>>> abc.line(abc.index)
+		(2, 5, '  bc d')
 		"""
-		self.assume(characters)
-		self.consumed.append(self.code.pop(0))
-		# Remove possible whitespace
-		self.whitespace()
-		return self.consumed[-1]
-		
-	def skip_while(self, characters: str, reverse=False) -> str:
+		number = bisect(self.newlines, index)
+		start = self.newlines[number-1] + 1 if number else 0
+		line = self.line_code[start-self.line_start:]
+		return number + 1, index - start, line.partition('\n')[0]
+
+	def skip(self, *kinds: str) -> str:
 		"""
-		This method will return all the charaters that
-		are inside the given character list. It will also
-		assume that the current charater (the first
-		charater to be returned) is indeed within the
-		given characters.
-		The reverse flag will make this method check
-		until [x] insead of while [x]. This means that
-		all the charaters will be returned while they're
-		not inside the characters.
-		
-		>>> abc = Code('abcdefghilmn')
-		>>> abc.skip_while('cab')
-		'abc'
-		
-		We are left with 'defghilmn'.
-		Return chars until 'h', 'g' or 'i' is met. In
-		this case, 'g' is met after 'def'.
-		>>> abc.skip_while('hgi', reverse=True)
-		'def'
-		
-		Try to skip all character in 'xyz'. No character
-		is in 'xyz', so an error is raised.
-		>>> abc.skip_while('xyz')
+		This method skips the current token by moving
+		to the next one.
+		It will also assume the current token is of
+		one of the given kinds.
+		It will also return the text of the parsed token.
+
+		>>> abc = Code('a(12')
+
+		The first current token is 'a', which is
+		an identifier, so it is skipped and returned.
+		>>> abc.skip('IDENT')
+		'a'
+
+		The next current token is '(', which is
+		either a '(' or an '[', so it will be returned.
+		>>> abc.skip('(', '[')
+		'('
+
+		The next current token is '12', which is
+		not an identifier, so an exception will be raised.
+		>>> abc.skip('IDENT')
 		Traceback (most recent call last):
 			...
 		SystemExit
-		
-		We are left with 'ghilmn'.
-		This returns all character until anything in 'ghi',
-		but 'g' is immediately met, so '' is returned.
-		>>> abc.skip_while('ghi', reverse=True)
-		''
-		
-		An empty string will also raise an exception.
-		>>> Code.skip_while(Code(''), 'abc')
+
+		'12' has not be skipped, so it's still the current token.
+		>>> abc.token
+		Token(kind='NAT', text='12', start=2)
+
+		Trying to skip a token from an empty code will also
+		raise an exception.
+		>>> Code('').skip('IDENT')
 		Traceback (most recent call last):
 			...
 		SystemExit
 		"""
-		# Check if there's at least one character.
-		# This is unnecessary if we're skipping until
-		# we meet a certain value
-		if not reverse:
-			self.assume(characters)
-		popd: str = ''
-		# != is a xor. If reverse is true, then it's
-		# "while not self.is_in". If reverse is false,
-		# it's "while self.is_in".
-		while self.is_in(characters) != reverse:
-			popd += self.code.pop(0)
-			self.consumed.append(popd[-1])
-		self.whitespace()
+		self.assume(*kinds)
+		popd: str = self.token.text
+		if self.token.kind != EOF:
+			self.token = next(self.tokens)
 		return popd
-		
-	def is_in(self, characters: str) -> bool:
+
+	def split(self, size: int):
 		"""
-		This method checks if the current character is 
-		within the given characters. If the code is empty,
-		because everything has been parsed, it will return
-		False.
-		
-		>>> Code('abc').is_in('a')
+		This method splits the first size characters of the
+		current token off, as a punctuation token, that becomes
+		the current one. The rest is the next token.
+
+		>>> abc = Code(':+ 1')
+		>>> abc.split(1)
+		>>> abc.skip(':'), abc.skip('OP'), abc.skip('NAT')
+		(':', '+', '1')
+		"""
+		token = self.token
+		rest = Token(token.kind, token.text[size:], token.start + size)
+		self.token = Token(token.text[:size], token.text[:size], token.start)
+		self.tokens = chain((rest,), self.tokens)
+
+	def is_in(self, *kinds: str) -> bool:
+		"""
+		This method checks if the current token is
+		of one of the given kinds. If the code is empty,
+		because everything has been parsed, the kind
+		of the current token is EOF.
+
+		>>> Code('abc').is_in('IDENT')
 		True
-		>>> Code('abc').is_in('b')
+		>>> Code('abc').is_in('NAT')
 		False
-		>>> Code('abc').is_in('kaz')
+		>>> Code('abc').is_in('NAT', 'IDENT')
 		True
-		>>> Code('').is_in('kaz')
-		False
-		>>> Code('').is_in('')
-		False
-		>>> Code('abc').is_in('')
+		>>> Code('').is_in('IDENT')
 		False
-		"""
-		return bool(self.code and self.code[0] in characters)
-	
-	def startswith(self, characters: str) -> bool:
-		"""
-		This method checks if the current code
-		starts with the given characters.
-		
-		>>> Code('abcd').startswith('abc')
+		>>> Code('').is_in('EOF')
 		True
-		>>> Code('abcd').startswith('abx')
+		>>> Code('abc').is_in()
 		False
 		"""
-		return ''.join(self.code).startswith(characters)
-		
+		return self.token.kind in kinds
+
 	# Private
-		
-	def whitespace(self):
+
+	def record(self, chunks: Iterable[str]) -> Iterable[str]:
 		"""
-		This method removes all the trailing whitespaces.
-		
-		Removes all the whitespace from the code proprety.
-		(automatic .whitespace() call in __init__)
-		>>> abc = Code(' 	abc')
-		>>> abc.code
-		['a', 'b', 'c']
-		
-		If no whitespace is there, nothing is removed.
-		(automatic .whitespace() in __init__)
-		>>> abc = Code('abc')
-		>>> abc.code
-		['a', 'b', 'c']
+		This method passes the chunks to the lexer. Meanwhile,
+		it adds their newlines to the newline offsets and keeps
+		the code from the beginning of the line of the current
+		token, so that errors can show the line of code where
+		they happened. Anything before that is thrown away.
 		"""
-		while self.is_in(string.whitespace):
-			self.consumed.append(self.code.pop(0))
-		
-	def assume(self, characters: str):
+		for chunk in chunks:
+			self.newlines.extend(self.read + newline.start()
+								 for newline in re.finditer('\n', chunk))
+			self.read += len(chunk)
+			if self.token:
+				start = self.token.start - self.line(self.token.start)[1]
+				self.line_code = self.line_code[start-self.line_start:]
+				self.line_start = max(start, self.line_start)
+			self.line_code += chunk
+			yield chunk
+
+	def assume(self, *kinds: str):
 		"""
-		This method assumes the current character is
-		within the given characters, and raises an error
+		This method assumes the current token is
+		of one of the given kinds, and raises an error
 		otherwise.
-		
-		>>> Code('abc').assume('a')
-		>>> Code('abc').assume('b')
+
+		>>> Code('abc').assume('IDENT')
+		>>> Code('abc').assume('(')
 		Traceback (most recent call last):
 			...
 		SystemExit
-		>>> Code('1').assume(string.ascii_letters)
+		>>> Code('1').assume('IDENT', 'BACKTICK_IDENT')
 		Traceback (most recent call last):
 			...
 		SystemExit
-		
+
 		Please refer to is_in for more examples.
 		"""
-		if not self.is_in(characters):
-			unexpected(characters, self)
+		if not self.is_in(*kinds):
+			unexpected(kinds, self)
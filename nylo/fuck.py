@@ -3,59 +3,58 @@ This module manages when nylo or the user fuck up. It manages exception
 and try to make the user understand fully how badly he screwd up.
 """
 
-import string
 import sys
+from typing import Tuple
 	
 def fuck(message: str, code):
 	"""
 	This function handles formatting of errors.
 	
 	>>> from code import Code
-	>>> fuck('me!', Code('ya!', '\\nny'))
+	>>> fuck('me!', Code('\\nny ya!'))
 	Traceback (most recent call last):
 		...
 	SystemExit
 	"""
 	print('FUCK.') #most important part
-	line_number = code.consumed.count('\n') + 1
-	last_newline = ''.join(['\n']+code.consumed).rindex('\n')
-	first_newline = ''.join(code.code+['\n']).index('\n')
-	last_line = code.consumed[last_newline:] + code.code[:first_newline]
-	last_line = ''.join(last_line).replace('\t', '    ')
-	print(f"{line_number}| {last_line}")
-	print(' '*(len(code.consumed)-last_newline+len(str(line_number))+2)
-	   +'   '*code.consumed[last_newline:].count('\t')+'^ right here')
+	line_number, column, line = code.line(code.index)
+	tabs = line[:column].count('\t')
+	print(f"{line_number}| " + line.replace('\t', '    '))
+	print(' '*(column+len(str(line_number))+2)+'   '*tabs+'^ right here')
 	print(f'Error: {message}')
 	sys.exit()
 
-def unexpected(characters: str, code):
+def unexpected(kinds: Tuple[str], code):
 	"""
 	This function will handle raising exception when an unexpected
-	character is found while parsing for some characters.
+	token is found while parsing for some kinds of token.
 	
 	>>> from code import Code
-	>>> unexpected('(', Code('15'))
+	>>> unexpected(('(',), Code('15'))
 	Traceback (most recent call last):
 		...
 	SystemExit
 	
-	>>> unexpected('(', Code(''))
+	>>> unexpected(('(',), Code(''))
 	Traceback (most recent call last):
 		...
 	SystemExit
 	
-	>>> unexpected(string.digits, Code('hello'))
+	>>> unexpected(('NAT',), Code('hello'))
 	Traceback (most recent call last):
 		...
 	SystemExit
 	
-	>>> unexpected(string.ascii_letters, Code('15'))
+	>>> unexpected(('IDENT', 'BACKTICK_IDENT'), Code('15'))
 	Traceback (most recent call last):
 		...
 	SystemExit
 	"""
-	unexpected = 'EOF' if not code.code else f'character {code.code[0]!r}'
-	characters = ('variable' if string.ascii_letters in characters else
-			      'digits' if string.digits in characters else
-			      repr(characters))
-	fuck(f'Unexpected {unexpected} while parsing for {characters}.', code)
+	token = code.token
+	unexpected = ('EOF' if token.kind == 'EOF' else
+				  f'character {token.text!r}' if len(token.text) == 1 else
+				  f'token {token.text!r}')
+	expected = ('variable' if 'IDENT' in kinds else
+				'digits' if 'NAT' in kinds else
+				' or '.join(map(repr, kinds)))
+	fuck(f'Unexpected {unexpected} while parsing for {expected}.', code)
@@ -0,0 +1,332 @@
+"""
+This module lets a nylo file be parsed and binded again after it's
+been edited, without starting from scratch every time. It's what
+the --watch option of the command line uses.
+"""
+
+import io
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from contextlib import redirect_stdout
+from itertools import count
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+from code import Code
+from lexer import ARROW, BACKTICK_IDENT, EOF, IDENT
+from mesh import Mesh
+from parser import Parser, Path, me
+import stdlib
+
+# The value of a key that's not in the mesh, see Program.save
+missing = object()
+
+class Item(NamedTuple):
+	"""
+	A top-level definition of a file, `key: value` or `-> value`.
+	Start and end are the offsets of the code it's been parsed
+	from, and the entries are the values it added to the mesh,
+	before being binded.
+	"""
+	start: int
+	end: int
+	entries: Mesh
+
+
+class Program:
+	"""
+	A nylo file that can be updated. Each top-level definition is
+	saved as an Item, and the program is saved both before binding,
+	in the unbound dictionary, and after, in the mesh.
+	When the code changes, only the items that have been edited are
+	parsed again, and their entries are replaced. Binding a variable
+	only depends on which keys exist, so the only values that are
+	binded again, apart from the new ones, are those referring to
+	a name whose key has been added or removed.
+	If an update fails, the program is left as it was before.
+	"""
+
+	def __init__(self, root: Path, std: Mesh):
+		"""
+		Creates a new empty program, that will be parsed in root,
+		that must not be used by std, see stdlib.program.
+		"""
+		if stdlib.used(root, std):
+			raise ValueError(f'{root!r} is already used by the standard library.')
+		self.root = root
+		self.code = ''
+		self.items: List[Item] = []
+		self.mesh = Mesh(std)
+		self.mesh[root] = None
+		self.mesh[root + me] = root
+		self.unbound: Dict[Path, Tuple[Path, Path]] = {}
+		# The keys of the unbound values using each variable name
+		self.references: Dict[str, Set[Path]] = defaultdict(set)
+		# Shared by all the parsers, so hidden places never clash
+		self.hidden = count()
+		# The values the mesh had before the update that's being
+		# made, see Program.save
+		self.saved: Dict[Path, object] = {}
+
+	def update(self, code: str) -> int:
+		"""
+		This method updates the program to the given code, and
+		returns how many items have been parsed again.
+
+		>>> import stdlib
+		>>> p = Program(('base', 'x'), stdlib.load())
+		>>> p.update('a: 1\\nb: a\\nc: 3')
+		3
+		>>> p.mesh[('base', 'x', 'b')]
+		('base', 'x', 'a')
+
+		Changing `c` does not touch `a` and `b`.
+		>>> p.update('a: 1\\nb: a\\nc: 4')
+		1
+
+		Adding `a` inside `b` binds `b` again.
+		>>> p.update('a: 1\\nb: (a: 2, -> a)\\nc: 4')
+		1
+		>>> p.mesh[('base', 'x', 'b', 'self')]
+		('base', 'x', 'b', 'a')
+		>>> p.update('a: 1\\nb: (-> a)\\nc: 4')
+		1
+		>>> p.mesh[('base', 'x', 'b', 'self')]
+		('base', 'x', 'a')
+		>>> p.update('a: 1\\nb: (-> a)\\nc: 4\\n-> b')
+		2
+		>>> p.mesh[('base', 'x', 'self')]
+		('base', 'x', 'b')
+		>>> p.update('a: 1\\nb: (-> a)\\nc: 4')
+		1
+		>>> p.mesh[('base', 'x', 'self')]
+		('base', 'x')
+		
+		Errors are shown with the line they are in the whole code.
+		>>> p.update('a: 1\\nb: (-> a)\\nc: )')
+		Traceback (most recent call last):
+			...
+		SystemExit
+		>>> p.update('a: 1\\nb: (-> d)\\nc: 4')
+		Traceback (most recent call last):
+			...
+		SyntaxError: Name 'd' is not defined in ('base', 'x', 'b', 'self').
+		>>> p.update('a: 1\\nb: (-> a)\\nc: 4')
+		1
+		>>> p.mesh[('base', 'x', 'b', 'self')]
+		('base', 'x', 'a')
+		
+		If a key is written twice, the last value is the one kept.
+		>>> p.update('a: 1\\nb: a\\nb: 2')
+		2
+		>>> p.update('b: a\\nb: 2')
+		1
+		>>> p.mesh[('base', 'x', 'b')]
+		2
+		>>> p.update('a: 1\\nb: a')
+		2
+		>>> p.mesh[('base', 'x', 'b')]
+		('base', 'x', 'a')
+
+		A structure doesn't replace the value the key had before,
+		as when the whole code is parsed.
+		>>> code = 'a: 1\\na: ()\\n-> a'
+		>>> p.update(code)
+		3
+		>>> p.mesh == stdlib.program(code, ('base', 'x'), stdlib.load())
+		True
+
+		If the edit changes where an item ends, the whole code
+		is parsed again. A key can't be missing, as the value
+		would be written over the program itself.
+		>>> p.update('a: + 1 2\\nb: 3\\n-> a')
+		2
+		>>> p.update('a: + 1\\nb: 3\\n-> a')
+		Traceback (most recent call last):
+			...
+		SystemExit
+
+		A failed update leaves the program as it was, so the
+		next edits work as if it had never been made.
+		>>> p.update('a: 1\\nc: 2')
+		2
+		>>> p.update('a: + 1 + d (b: 0, -> d)\\nc: 2')
+		Traceback (most recent call last):
+			...
+		SystemExit
+		>>> p.update('a: 1\\nb: (x: 0, -> d)\\nc: 2')
+		Traceback (most recent call last):
+			...
+		SyntaxError: Name 'd' is not defined in ('base', 'x', 'b', 'self').
+		>>> p.update('b: 3')
+		1
+		>>> p.mesh == stdlib.program('b: 3', ('base', 'x'), stdlib.load())
+		True
+		"""
+		old, self.code = self.code, code
+		prefix = common(old, code)
+		suffix = common(old[prefix:][::-1], code[prefix:][::-1])
+		# The edited code, [lo, hi) in the old code
+		lo, hi = prefix, len(old) - suffix
+		first = bisect_left([item.end for item in self.items], lo)
+		last = bisect_right([item.start for item in self.items], hi)
+		start = self.items[first-1].end if first else 0
+		end = self.items[last].start if last < len(self.items) else len(old)
+		delta = len(code) - len(old)
+
+		try:
+			with redirect_stdout(io.StringIO()):
+				items = self.parse(code[start:end+delta], start)
+		except SystemExit:
+			# The edit can change where an item ends, so the items
+			# are all parsed again, and only the errors of the whole
+			# code are shown, with the right line
+			first, last = 0, len(self.items)
+			try:
+				items = self.parse(code, 0)
+			except SystemExit:
+				self.code = old
+				raise
+		touched = {key for item in self.items[first:last]
+				   for key in item.entries}
+		touched.update(key for item in items for key in item.entries)
+		existed = touched & self.unbound.keys()
+		updated = self.items[:first] + items + [item._replace(
+			start=item.start+delta, end=item.end+delta)
+			for item in self.items[last:]]
+		# A key written by more than one item has the value it would
+		# have if the whole code was parsed: the last one, unless
+		# it's None, that Parser.structure_end writes only if the
+		# key has no value yet.
+		values = {}
+		for item in updated:
+			for key in touched & item.entries.keys():
+				if item.entries[key] is not None or not key in values:
+					values[key] = item.entries[key]
+
+		# Nothing is changed until the values are binded, and
+		# what's been changed is restored if they can't be
+		state = (self.items, dict(self.unbound),
+				 {name: set(keys) for name, keys in self.references.items()})
+		self.saved = {}
+		try:
+			self.items = updated
+			for key in existed - values.keys():
+				self.forget(key)
+			for key, value in values.items():
+				self.learn(key, value)
+			self.rebind(values.keys(), existed ^ values.keys())
+		except Exception:
+			self.code = old
+			self.items, self.unbound, references = state
+			self.references = defaultdict(set, references)
+			for key, value in self.saved.items():
+				if value is not missing:
+					self.mesh[key] = value
+				elif key in self.mesh:
+					del self.mesh[key]
+			raise
+		finally:
+			self.saved = {}
+		return len(items)
+
+	# Private
+
+	def parse(self, code: str, offset: int) -> List[Item]:
+		"""
+		This method parses the items in code, that begins at
+		offset in the code of the program.
+		"""
+		parser = Parser(Code(code))
+		parser.hidden = self.hidden
+		items = []
+		while not parser.code.is_in(EOF):
+			start = parser.code.index
+			parser.mesh = Mesh({})
+			if parser.code.is_in(ARROW):
+				parser.code.skip(ARROW)
+				parser.run(parser.value, self.root + me, None)
+				parser.code.skip(EOF)
+			else:
+				# Without a name, the value would be the program itself
+				parser.code.assume(IDENT, BACKTICK_IDENT)
+				key = parser.var()
+				parser.colon()
+				parser.run(parser.value, self.root + key, None)
+			while parser.code.is_in(','):
+				parser.code.skip(',')
+			items.append(Item(offset + start, offset + parser.code.index,
+							  parser.mesh))
+		return items
+
+	def learn(self, key: Path, value):
+		"""
+		This method adds an unbound value to the program. If the
+		key is written more than once, the last value is kept.
+		"""
+		self.save(key)
+		old = self.unbound.get(key)
+		if isinstance(old, tuple):
+			self.references[old[1][0]].discard(key)
+		self.unbound[key] = value
+		self.mesh[key] = value
+		if isinstance(value, tuple):
+			self.references[value[1][0]].add(key)
+
+	def forget(self, key: Path):
+		"This method removes a value from the program."
+		self.save(key)
+		value = self.unbound.pop(key)
+		del self.mesh[key]
+		if isinstance(value, tuple):
+			self.references[value[1][0]].discard(key)
+
+	def rebind(self, learned: Iterable[Path], changed: Set[Path]):
+		"""
+		This method binds the values that have been learned, and
+		the old ones that might now refer to a different value,
+		as a key they could refer to has been added or removed.
+		"""
+		tobind = set(learned)
+		for key in changed:
+			for reference in self.references[key[-1]]:
+				context = self.unbound[reference][0]
+				if context[:len(key)-1] == key[:-1]:
+					tobind.add(reference)
+		for key in tobind:
+			self.save(key)
+			self.mesh[key] = self.unbound[key]
+		if not self.root + me in self.unbound:
+			self.save(self.root + me)
+			self.mesh[self.root + me] = self.root
+		self.mesh.bind(tobind)
+
+	def save(self, key: Path):
+		"""
+		This method saves the value key has in the mesh before it's
+		changed by an update, so that it's restored if the update
+		fails. Only the first value is saved.
+		"""
+		if not key in self.saved:
+			self.saved[key] = self.mesh.get(key, missing)
+
+
+def common(a: str, b: str) -> int:
+	"""
+	This function returns the length of the common prefix
+	of two strings. It bisects the length, so that only a
+	few slices of the strings are compared.
+
+	>>> common('abcdef', 'abcxef')
+	3
+	>>> common('abc', 'abc')
+	3
+	>>> common('', 'abc')
+	0
+	"""
+	lo, hi = 0, min(len(a), len(b))
+	while lo < hi:
+		mid = (lo + hi + 1) // 2
+		if a[lo:mid] == b[lo:mid]:
+			lo = mid
+		else:
+			hi = mid - 1
+	return lo
@@ -0,0 +1,118 @@
+"""
+This module splits nylo code into tokens. The parser never looks at
+single characters: it asks the Code class for the current token, and
+the Code class gets them from the tokenize generator defined here.
+Tokens are matched with one compiled regular expression, and the code
+is read a chunk at a time, so that even big files are tokenized in
+one linear pass without ever being fully loaded in memory.
+"""
+
+import re
+from string import punctuation, whitespace
+from typing import Iterable, Iterator, NamedTuple, TextIO
+
+# Token kinds. Punctuation tokens use the character itself as kind.
+IDENT = 'IDENT'
+BACKTICK_IDENT = 'BACKTICK_IDENT'
+NAT = 'NAT'
+STRING = 'STRING'
+OP = 'OP'
+ARROW = 'ARROW'
+ERROR = 'ERROR'
+EOF = 'EOF'
+
+# '_' and '`' start names, so they are never part of an operator
+operators = ''.join(sorted(set(punctuation) - set('[](),\'\".\\_`')))
+
+# The order is important, as the first alternative that matches
+# is the one that's picked: '->' is an arrow and not an operator,
+# and ':' is punctuation unless it starts an operator, like ':='.
+# It's still punctuation before an arrow, as in `a:-> b`.
+pattern = re.compile('|'.join(f'(?P<{kind}>{regex})' for kind, regex in (
+	('WHITESPACE', f'[{re.escape(whitespace)}]+'),
+	(BACKTICK_IDENT, '`[^`]*`'),
+	(IDENT, '[A-Za-z_][A-Za-z0-9_]*'),
+	(NAT, '[0-9]+'),
+	(STRING, '\'[^\']*\'|"[^"]*"'),
+	(ARROW, '->'),
+	('PUNCT', f'[()\\[\\],.]|:(?![{re.escape(operators)}])|:(?=->)'),
+	(OP, f'[{re.escape(operators)}]+'),
+)))
+
+
+class Token(NamedTuple):
+	"""
+	A single token. The kind is one of the constants of this module,
+	or the character itself for punctuation. Start is the offset of
+	the first character of the token from the beginning of the code.
+	"""
+	kind: str
+	text: str
+	start: int
+
+
+def tokenize(chunks: Iterable[str]) -> Iterator[Token]:
+	"""
+	This generator yields the tokens of the code made by joining
+	all the given chunks. Whitespace is skipped, and characters that
+	cannot start any token are yielded as ERROR tokens, so that the
+	parser can complain about them. The last token is always EOF.
+	A token can be split across chunks: if a match reaches the end
+	of what has been read so far, the next chunk is read and the
+	match is tried again. The only thing kept in memory is the
+	token that's being matched.
+
+	>>> [t.kind for t in tokenize(['fib(n: 1', '0 -> `x y`)'])]
+	['IDENT', '(', 'IDENT', ':', 'NAT', 'ARROW', 'BACKTICK_IDENT', ')', 'EOF']
+	>>> [t.text for t in tokenize(['a.b += "hi', ' you"'])]
+	['a', '.', 'b', '+=', '"hi you"', '']
+	>>> [t.text for t in tokenize(['a := b: c:->d'])]
+	['a', ':=', 'b', ':', 'c', ':', '->', 'd', '']
+	>>> [t.text for t in tokenize(['a:_b, c:`x`'])]
+	['a', ':', '_b', ',', 'c', ':', '`x`', '']
+	>>> [t.start for t in tokenize(['a.b ', '', ' \\\\ c'])]
+	[0, 1, 2, 5, 7, 8]
+	>>> [t.kind for t in tokenize(['"never closed'])]
+	['ERROR', 'IDENT', 'IDENT', 'EOF']
+	"""
+	chunks = iter(chunks)
+	buffer, offset, position = '', 0, 0
+	more = True
+	while True:
+		match = pattern.match(buffer, position)
+		# The token could go on in the next chunk.
+		if more and (match is None or match.end() == len(buffer)):
+			chunk = next(chunks, None)
+			if chunk is None:
+				more = False
+			else:
+				buffer = buffer[position:] + chunk
+				offset += position
+				position = 0
+			continue
+		if position == len(buffer):
+			yield Token(EOF, '', offset + position)
+			return
+		if match is None:
+			yield Token(ERROR, buffer[position], offset + position)
+			position += 1
+			continue
+		position = match.end()
+		kind = match.lastgroup
+		if kind == 'WHITESPACE':
+			continue
+		text = match.group()
+		yield Token(text if kind == 'PUNCT' else kind, text,
+					offset + match.start())
+
+
+def read_chunks(file: TextIO, size: int = 1 << 16) -> Iterator[str]:
+	"""
+	This returns an iterator that reads a file a chunk at a time,
+	so that it can be tokenized without reading it all.
+
+	>>> import io
+	>>> [*read_chunks(io.StringIO('abcde'), 2)]
+	['ab', 'cd', 'e']
+	"""
+	return iter(lambda: file.read(size), '')
@@ -0,0 +1,565 @@
+"""
+This module compiles the definitions of a binded mesh, so that the
+value of a call can be found by a small machine instead of cloning
+the definition into the call. Cloning is what lets any value of a
+definition be changed by who calls it, but most calls just take
+some numbers and give back a number or a bool: the machine runs
+them on frames, that only keep what's been found in each call, and
+the mesh is just told the value of the call at the end.
+Anything the machine doesn't know how to run, like building a
+structure or a list, makes it give up, and the call is cloned and
+evaluated by the mesh as usual, so the results are always the same.
+"""
+
+from typing import Dict, Generator, List, NamedTuple, Optional, Set, Tuple
+from mesh import Mesh, literal, structure
+
+class Unsupported(Exception):
+	"""
+	Raised when the machine finds something it can't run, so
+	that the call is evaluated by the mesh instead.
+	"""
+
+
+class Frame:
+	"""
+	A call being run by the machine. Root is the definition that's
+	called, and site is the path of the call in the definition
+	of the caller, where the arguments are. If the definition is
+	inside another call, that's the parent. The values found in
+	the call are saved by their path after root, together with
+	the frames of the calls made from it, by their path, and the
+	arguments that have been needed, in order, see Machine.recall.
+	"""
+	__slots__ = ('root', 'site', 'caller', 'parent', 'values',
+				 'frames', 'needed')
+
+	def __init__(self, root: Tuple[str], site: Optional[Tuple[str]],
+				 caller: Optional['Frame'], parent: Optional['Frame']):
+		"Creates a new frame, where nothing has been found yet."
+		self.root = root
+		self.site = site
+		self.caller = caller
+		self.parent = parent
+		self.values: Dict[Tuple[str], object] = {}
+		self.frames: Dict[Tuple[str], Frame] = {}
+		self.needed: List[Tuple[Tuple[str], object]] = []
+
+
+# The caller of the call the machine is started from: its
+# arguments are asked to the mesh
+outside = Frame((), None, None, None)
+# The structures of literals, see mesh.structure
+primitives = {('base', 'nat'), ('base', 'string'), ('base', 'list')}
+# Saved as the value of a path while it's being looked for
+busy = object()
+
+class Closure:
+	"""
+	A definition inside a call being run by the machine, found as
+	the value of a path: the mesh would give the path it's been
+	cloned to, so it's kept together with the frame of the call,
+	and the paths after it are looked for in a new frame inside
+	that one.
+	"""
+	__slots__ = ('path', 'frame')
+
+	def __init__(self, path: Tuple[str], frame: Frame):
+		"Creates a new closure."
+		self.path = path
+		self.frame = frame
+
+
+class Branch(NamedTuple):
+	"""
+	A node of the calls remembered by Machine.recall: the path of
+	the argument that's needed next, and what follows from each
+	of its values, either another Branch or the value of the call.
+	"""
+	path: Tuple[str]
+	values: dict
+
+
+class Machine:
+	"""
+	The compiled definitions of a mesh. Each key is compiled once
+	to what has to be done to find its value, or the value of a
+	path starting with it, and the calls to a definition whose
+	value is None are run as frames, without touching the mesh:
+	- a number is itself, and `prev` and `succ` of it are one less
+	and one more, as `base.nat.pos` would give.
+	- a value that's another path is the value of that path, in
+	the frame of the call it's in, if it's inside one.
+	- a path inside a call whose value is `same` is the value of
+	`then` or `else`, comparing `first` and `second` like the
+	mesh does, and one whose value is an operator is found with
+	Mesh.intrinsics, if the first argument is a number, or as a
+	call to the definition of the operator in its value.
+	- a path inside a call to a definition is looked for in a new
+	frame, where the paths inside the definition are the values
+	of the arguments, if the call has one, and the values of the
+	definition otherwise.
+	Values are found only when they're needed, and then saved in
+	the frame, like the mesh would do, and the frames and the
+	tasks waiting for values are kept on a stack, like in
+	Mesh.valueof, so that calls can go as deep as memory allows.
+
+	>>> import stdlib
+	>>> from writer import Writer
+	>>> m = stdlib.program('''
+	...   count: (n: nat, total: nat, -> same(
+	...     first: n, second: 0, then: total,
+	...     else: count(n: n.prev, total: total.succ)))
+	...   -> count(n: 3000, total: 7)
+	... ''', ('base', 'x'))
+	>>> m.machine = Machine(m)
+	>>> Writer(m).write(('base', 'x', 'self'))
+	'3007'
+
+	A value that's a path with keys after it, like a list element
+	with its value and next, is changed by them, so the machine
+	gives up on it, and the call is cloned.
+
+	>>> code = 'k: (n: nat -> [n n]), -> [k(n: 4) len(of: k(n: 2))]'
+	>>> m, interpreted = (stdlib.program(code, ('base', 'x'))
+	...                   for _ in range(2))
+	>>> m.machine = Machine(m)
+	>>> Writer(m).write(('base', 'x', 'self'))
+	'[[4 4] 2]'
+	>>> Writer(interpreted).write(('base', 'x', 'self'))
+	'[[4 4] 2]'
+
+	When a call needs what an argument doesn't have, like `next`
+	of an empty list in `len_`, the machine gives up, and the mesh
+	looks for it around the call, like it always does, going on
+	forever in this case, instead of finding that it's not defined.
+	The calls to a definition the machine has given up on are
+	always cloned after that, as they would most likely make it
+	give up again, after having done part of the work for nothing.
+
+	>>> from mesh import Limits
+	>>> m = stdlib.program('-> len(of: [])', ('base', 'x'))
+	>>> m.machine = Machine(m)
+	>>> m.limits = Limits(steps=1000)
+	>>> Writer(m).write(('base', 'x', 'self')) # doctest: +ELLIPSIS
+	Traceback (most recent call last):
+		...
+	mesh.Exhausted: The limit of steps has been reached evaluating ('base', 'x', 'self'), at ...
+	"""
+
+	# Public:
+
+	def __init__(self, mesh: Mesh):
+		"Compiles all the keys of a mesh, that must be binded."
+		self.code = {key: compile(mesh, key, value)
+					 for key, value in dict.items(mesh)}
+		# The names after each path in the keys, like Mesh.children
+		self.children: Dict[Tuple[str], List[str]] = {}
+		for key in self.code:
+			self.children.setdefault(key[:-1], []).append(key[-1])
+		# The keys whose value is another path, that they change
+		# with the keys after them, like a list element does with
+		# its value and next, other than the hidden ones of calls
+		self.instances = {key for key, names in self.children.items()
+						  if key in self.code and self.code[key][0] in
+						  ('alias', 'call', 'same') and
+						  any(not name.endswith('.') for name in names)}
+		# The values of the paths that are not inside any call,
+		# and the frames of the calls that are not either
+		self.values: Dict[Tuple[str], object] = {}
+		self.frames: Dict[Tuple[str], Frame] = {}
+		# The arguments of each call site, see Machine.recall
+		self.shapes: Dict[Tuple[str], tuple] = {}
+		self.memo: Dict[tuple, object] = {}
+		self.remembered = 0
+		# The length of the key each path starts with, see
+		# Machine.run, and which paths are given by each call
+		# site, see Machine.overridden, as they're looked for
+		# again in every call
+		self.ends: Dict[tuple, int] = {}
+		self.overrides: Dict[tuple, bool] = {}
+		# The mesh the machine is running for
+		self.mesh: Optional[Mesh] = None
+		# The definitions the machine has given up on, and the
+		# values being looked for, that are left busy if it does
+		self.abandoned: Set[Tuple[str]] = set()
+		self.busy: List[Tuple[dict, Tuple[str]]] = []
+
+	def call(self, mesh: Mesh, function: Tuple[str],
+			 call: Tuple[str], done) -> Generator:
+		"""
+		This task returns the value of call, whose value is
+		function, or None if the machine can't find it, or if
+		function is not one of its definitions. The arguments
+		of the call are asked to the mesh, and they must be
+		numbers, see Mesh.number, or definitions. Each value
+		looked for in a frame is a step of Mesh.limits, and
+		the ones waiting count as keys of the mesh.
+		What's been found is kept for the next calls even if
+		the machine gives up, as it doesn't depend on them.
+		"""
+		if self.code.get(function) != ('structure',):
+			return None
+		if function in Mesh.intrinsics or function in self.abandoned:
+			return None
+		self.mesh = mesh
+		self.busy.clear()
+		frame = Frame(function, call, outside, None)
+		stack = [self.evaluate(function + ('self',), frame)]
+		value = None
+		while stack:
+			try:
+				path, frame = stack[-1].send(value)
+			except StopIteration as stop:
+				stack.pop()
+				value = stop.value
+				continue
+			except Unsupported:
+				break
+			if frame is outside:
+				if len(path) > len(call) + 1 and not (yield from self.has(
+						mesh, path[:len(call)+1], path[len(call)+1], done)):
+					break
+				found = yield path, done
+				value = mesh.number(path)
+				if value is None and not self.constant(found):
+					break
+				if value is None:
+					value = found
+			else:
+				if mesh.limits:
+					mesh.limits.check(mesh, call + ('self',), path, len(stack))
+				stack.append(self.evaluate(path, frame))
+				value = None
+		else:
+			return None if isinstance(value, Closure) else value
+		for values, key in self.busy:
+			if values.get(key) is busy:
+				del values[key]
+		self.abandoned.add(function)
+		return None
+
+	# Private:
+
+	def has(self, mesh: Mesh, argument: Tuple[str], name: str,
+			done) -> Generator:
+		"""
+		This task checks if the value of an argument of the call
+		has the propriety name. If it doesn't, the mesh would look
+		for it in what's around the call, cloning the call itself,
+		that the machine can't do, so it gives up. It also does
+		if the argument is not one of the definitions, before the
+		mesh clones anything to find the propriety, so that the
+		mesh is left as it was.
+		"""
+		for value in (mesh.number(argument), mesh.packed(argument)):
+			if value is not None:
+				return (literal(value, name) is not None or
+						structure(value) + (name,) in mesh)
+		found = yield argument, done
+		return self.constant(found) and found + (name,) in mesh
+
+	def evaluate(self, path: Tuple[str], frame: Optional[Frame]) -> Generator:
+		"""
+		This task returns the value of path, as seen from frame:
+		a number, a path whose value is None, or a Closure. It
+		yields the paths it needs the value of, together with
+		the frame to look for them in, see Machine.call.
+		"""
+		while frame is not None and not (len(path) > len(frame.root) and
+										 path[:len(frame.root)] == frame.root):
+			frame = frame.parent
+		if frame is None:
+			values, key = self.values, path
+		else:
+			values, key = frame.values, path[len(frame.root):]
+		value = values.get(key)
+		if value is busy:
+			raise Unsupported(path)
+		if value is not None:
+			return value
+		values[key] = busy
+		self.busy.append((values, key))
+		memorable = key == ('self',) and self.memorable(frame)
+		if memorable:
+			value = yield from self.recall(frame)
+		if value is not None:
+			pass
+		elif frame is not None and self.overridden(frame, key):
+			value = yield frame.site + key, frame.caller
+			frame.needed.append((key, value))
+		else:
+			value = yield from self.run(path, frame)
+			if memorable and not isinstance(value, Closure):
+				self.remember(frame, value)
+		values[key] = value
+		return value
+
+	def run(self, path: Tuple[str], frame: Optional[Frame]) -> Generator:
+		"""
+		This task finds the value of path in the definitions,
+		with what the longest key path starts with has been
+		compiled to. Only the keys inside the root of frame are
+		looked at, as the rest is somewhere else.
+		"""
+		start = len(frame.root) + 1 if frame else 1
+		end = self.ends.get((path, start))
+		if end is None:
+			for end in range(len(path), start - 1, -1):
+				if path[:end] in self.code:
+					break
+			else:
+				raise Unsupported(path)
+			self.ends[path, start] = end
+		key, rest = path[:end], path[end:]
+		code = self.code[key]
+		kind = code[0]
+		if not rest:
+			if kind == 'number':
+				return code[1]
+			if kind == 'structure':
+				return Closure(key, frame) if frame else key
+			if kind in ('alias', 'call', 'same') and (
+					not key in self.instances) and not (
+					frame and key == frame.root + ('self',) and
+					code[1] == frame.root):
+				return (yield code[1], frame)
+			raise Unsupported(path)
+		if kind == 'number':
+			return access(code[1], rest)
+		if kind == 'same':
+			if rest[0] != 'self':
+				raise Unsupported(path)
+			first = yield key + ('first',), frame
+			second = yield key + ('second',), frame
+			if isinstance(first, Closure) or isinstance(second, Closure):
+				raise Unsupported(path)
+			branch = 'then' if kind_of(first) == kind_of(second) else 'else'
+			return (yield key + (branch,) + rest[1:], frame)
+		if kind == 'operator':
+			return (yield from self.operator(code[1], key, rest, frame))
+		if kind == 'call':
+			parent = frame
+			while parent is not None and not (
+					len(code[1]) > len(parent.root) and
+					code[1][:len(parent.root)] == parent.root):
+				parent = parent.parent
+			if parent is not None and self.overridden(
+					parent, code[1][len(parent.root):]):
+				raise Unsupported(path)
+			return (yield code[1] + rest, self.enter(code[1], key, frame, parent))
+		if kind == 'alias':
+			value = yield code[1], frame
+			if isinstance(value, int):
+				return access(value, rest)
+			if isinstance(value, Closure):
+				return (yield value.path + rest,
+						self.enter(value.path, key, frame, value.frame))
+			return (yield value + rest, self.enter(value, key, frame, None))
+		raise Unsupported(path)
+
+	def operator(self, function: Tuple[str], key: Tuple[str],
+				 rest: Tuple[str], frame: Optional[Frame]) -> Generator:
+		"""
+		This task returns the value of key + rest, where key is
+		the call of an operator, like Mesh.operator would find
+		it: if the first argument is a number, the intrinsic of
+		its structure is used, otherwise the operator of the
+		argument is called.
+		"""
+		operand = yield function[:-1], frame
+		if isinstance(operand, int):
+			intrinsic = Mesh.intrinsics.get(structure(operand) + function[-1:])
+			if intrinsic is None or rest[0] != 'self' or any(
+					kind is not int for kind in intrinsic.types):
+				raise Unsupported(key)
+			values = []
+			for argument in intrinsic.arguments:
+				values.append((yield key + argument, frame))
+			if not all(isinstance(value, int) for value in values):
+				raise Unsupported(key)
+			value = intrinsic.compute(*values)
+			if isinstance(value, tuple):
+				return (yield value + rest[1:], None)
+			return access(value, rest[1:])
+		if isinstance(operand, Closure):
+			called = operand.path + function[-1:]
+			parent = operand.frame
+		else:
+			called = operand + function[-1:]
+			# The argument is cloned as it is into the call, and
+			# the operator is called from there
+			parent = Frame(operand, None, None, None)
+		if self.code.get(called) != ('structure',):
+			raise Unsupported(key)
+		return (yield called + rest, self.enter(called, key, frame, parent))
+
+	def enter(self, root: Tuple[str], site: Tuple[str],
+			  caller: Optional[Frame], parent: Optional[Frame]) -> Frame:
+		"""
+		This method returns the frame of the call at site, made
+		from caller, that calls root, so that what's found in it
+		is kept for the next time it's needed.
+		"""
+		frames = caller.frames if caller else self.frames
+		if not site in frames:
+			frames[site] = Frame(root, site, caller, parent)
+		return frames[site]
+
+	def overridden(self, frame: Frame, path: Tuple[str]) -> bool:
+		"""
+		This method checks if the value of path, that's inside
+		the definition of frame, is given by the call, because
+		the call has a value on path or on a path it starts with.
+		"""
+		if frame.site is None:
+			return False
+		if frame.caller is outside:
+			return any(frame.site + path[:i] in self.mesh
+					   for i in range(1, len(path) + 1))
+		if not (frame.site, path) in self.overrides:
+			self.overrides[frame.site, path] = any(
+				frame.site + path[:i] in self.code
+				for i in range(1, len(path) + 1))
+		return self.overrides[frame.site, path]
+
+	def constant(self, value) -> bool:
+		"""
+		This method checks if a value the mesh has found can be
+		used by the machine: it must be one of the definitions,
+		and not the structure of a literal, see mesh.structure,
+		as the literal itself would be lost.
+		"""
+		return (isinstance(value, tuple) and
+				self.code.get(value) == ('structure',) and
+				not value[:2] in primitives)
+
+	def memorable(self, frame: Optional[Frame]) -> bool:
+		"""
+		This method checks if the value of a call can be saved
+		for Machine.recall: the call must have just been started,
+		and it must not be inside another call, nor the call
+		the machine is run for, whose arguments are in the mesh.
+		"""
+		return (frame is not None and frame.caller is not outside and
+				len(frame.values) == 1 and self.mesh.memo > 0 and
+				(frame.parent is None or frame.parent.site is None))
+
+	def recall(self, frame: Frame) -> Generator:
+		"""
+		This task returns the value of a call, if a call with the
+		same arguments to the same definition has been run, or
+		None. The values of calls only depend on the arguments
+		that are needed, and they're needed in the same order
+		until one has a different value, so the calls are
+		remembered as a tree, where each branch is an argument
+		and each leaf is the value of the call, see Branch.
+		At most Mesh.memo values are remembered.
+		"""
+		key = (frame.root, self.shape(frame.site))
+		node = self.memo.get(key)
+		while isinstance(node, Branch):
+			value = yield frame.root + node.path, frame
+			node = node.values.get(value)
+		return node
+
+	def shape(self, site: Tuple[str]) -> tuple:
+		"""
+		This method returns the paths of the arguments given at
+		site, as calls to the same definition have the same
+		values only if they give the same arguments.
+		"""
+		if not site in self.shapes:
+			paths, stack = [], [()]
+			while stack:
+				path = stack.pop()
+				for name in self.children.get(site + path, ()):
+					paths.append(path + (name,))
+					stack.append(path + (name,))
+			self.shapes[site] = tuple(sorted(paths))
+		return self.shapes[site]
+
+	def remember(self, frame: Frame, value):
+		"""
+		This method saves the value of a call, after the
+		arguments it needed, for Machine.recall.
+		"""
+		if self.mesh.memo <= self.remembered:
+			self.memo.clear()
+			self.remembered = 0
+		nodes, key = self.memo, (frame.root, self.shape(frame.site))
+		for path, needed in frame.needed:
+			if isinstance(needed, Closure):
+				return
+			node = nodes.get(key)
+			if node is None:
+				node = nodes[key] = Branch(path, {})
+			elif not isinstance(node, Branch) or node.path != path:
+				return
+			nodes, key = node.values, needed
+		if not key in nodes:
+			nodes[key] = value
+			self.remembered += 1
+
+
+def compile(mesh: Mesh, key: Tuple[str], value) -> tuple:
+	"""
+	This function compiles the value of a key, to what the machine
+	does when it's found, or when a path starting with it is:
+	- ('number', n) for a number.
+	- ('structure',) for None, a value of its own.
+	- ('same', path), ('operator', path) and ('call', path) for
+	calls to `same`, to an operator and to a definition.
+	- ('alias', path) for any other path.
+	- ('literal',) for strings and lists, that the machine can't use.
+
+	>>> m = Mesh({('f',): None, ('a',): ('f',), ('b',): ('a',), ('n',): 3,
+	...           ('c', 'args', 'value'): 1})
+	>>> compile(m, ('a',), ('f',)), compile(m, ('b',), ('a',))
+	(('call', ('f',)), ('alias', ('a',)))
+	>>> compile(m, ('c',), ('c', 'args', 'value', '+'))
+	('operator', ('c', 'args', 'value', '+'))
+	"""
+	if isinstance(value, int):
+		return ('number', value)
+	if value is None:
+		return ('structure',)
+	if not isinstance(value, tuple):
+		return ('literal',)
+	if value == ('same',):
+		return ('same', value)
+	if value[-1] in Mesh.operators and not value in mesh:
+		return ('operator', value)
+	if value in mesh and mesh[value] is None:
+		return ('call', value)
+	return ('alias', value)
+
+def access(value, names: Tuple[str]):
+	"""
+	This function returns the value of the proprieties with the
+	given names, one after the other, of a value the machine has
+	found: only `prev` and `succ` of numbers can be found.
+
+	>>> access(3, ('prev', 'prev', 'succ')), access(('a',), ())
+	(2, ('a',))
+	>>> access(0, ('prev',))
+	Traceback (most recent call last):
+		...
+	machine.Unsupported: (0, ('prev',))
+	"""
+	for name in names:
+		if not isinstance(value, int) or not (
+				name == 'succ' or name == 'prev' and value):
+			raise Unsupported((value, names))
+		value += 1 if name == 'succ' else -1
+	return value
+
+def kind_of(value) -> Tuple[str]:
+	"""
+	This function returns what Mesh.valueof would give for a value
+	the machine has found, as `same` compares those.
+
+	>>> kind_of(0), kind_of(2), kind_of(('a',))
+	(('base', 'nat', 'zero'), ('base', 'nat', 'pos'), ('a',))
+	"""
+	return structure(value) if isinstance(value, int) else value
@@ -4,7 +4,146 @@ just like a normal dictionary, but provides more methods
 to automatically bind variables and move group of variables.
 """
 
-from typing import Tuple
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+from itertools import count
+from operator import length_hint
+from typing import (Callable, Dict, Generator, Iterable, Iterator, List,
+	NamedTuple, Optional, Set, Tuple, Union)
+
+# Types of the values of literals that are saved as they are
+literals = (int, str, memoryview)
+
+# Couples of oldroot and newroot, given to chroot one after the other
+Mapping = Tuple[Tuple[Tuple[str], Tuple[str]], ...]
+
+# What a value is, to compare calls, see Mesh.normal
+Normal = Union[Tuple[str], int, str, bytes, tuple]
+
+class Intrinsic(NamedTuple):
+	"""
+	A function of std that Mesh.intrinsic computes in python:
+	the paths of its arguments in a call, the type of literal
+	each of them must be, an int for a number or a memoryview
+	for a list of numbers, and what it computes from them. If
+	that's None, the call is evaluated as usual.
+	"""
+	arguments: Tuple[Tuple[str], ...]
+	types: Tuple[type, ...]
+	compute: Callable
+
+# The paths of the arguments of an operator in its call
+operands = (('args', 'value'), ('args', 'next', 'value'))
+
+class Task(NamedTuple):
+	"""
+	A task waiting for a value on the stack of Mesh.valueof,
+	see Mesh.run, that clones source to target and then looks
+	for the value of path. Mesh.collect must not remove them
+	while it's waiting.
+	"""
+	run: Generator
+	source: Tuple[str]
+	target: Tuple[str]
+	path: Tuple[str]
+
+class Forward(NamedTuple):
+	"""
+	What a task returns when its value is the value of path,
+	with the clones already done, so that Mesh.valueof looks
+	for it without keeping the task on its stack. This way,
+	calls that are the value of other calls don't make the
+	stack longer, see Mesh.tail.
+	"""
+	path: Tuple[str]
+	done: tuple
+
+class Exhausted(RuntimeError):
+	"""
+	Raised when the evaluation of a mesh goes over one of its
+	Limits: limit is which one, 'steps', 'size' or 'seconds',
+	path is what Mesh.valueof was asked for, and at is the path
+	it was looking for when the limit was reached. Like a
+	RecursionError, what was being evaluated is left half done.
+	If the mesh is given, the message shows the paths with
+	Mesh.readable.
+	"""
+	def __init__(self, limit: str, path: Tuple[str], at: Tuple[str],
+				 mesh: Optional['Mesh'] = None):
+		shown = (path, at) if mesh is None else map(mesh.readable, (path, at))
+		super().__init__('The limit of {} has been reached evaluating '
+						 '{!r}, at {!r}.'.format(limit, *shown))
+		self.limit = limit
+		self.path = path
+		self.at = at
+
+class Limits:
+	"""
+	The most the evaluation of a mesh can take, see Mesh.limits:
+	how many steps, that are the values looked for by Mesh.valueof,
+	the calls it makes, together with the values Mesh.recall looks
+	at to find their signature, and the values the machine looks
+	for, so that every step takes about the same time, how
+	many keys the mesh can have, and how many seconds can pass from
+	when the limits are made. None is no limit. They're checked at
+	every step, so a definition that never ends raises Exhausted,
+	instead of going on until there's no more memory.
+
+	>>> m = Mesh({('f',): None, ('f', 'self'): ('f', 'self', 'x.', 'self'),
+	...           ('f', 'self', 'x.'): ('f',), ('c',): ('f',)})
+	>>> m.limits = Limits(steps=100)
+	>>> m.valueof(('c', 'self')) # doctest: +ELLIPSIS
+	Traceback (most recent call last):
+		...
+	mesh.Exhausted: The limit of steps has been reached evaluating ('c', 'self'), at ...
+	
+	That call doesn't make the mesh bigger, see Mesh.tail, but
+	one that passes on a value that's not found yet does.
+	>>> m[('f', 'n')], m[('f', 'self', 'x.', 'n')] = None, ('f', 'n', 'succ')
+	>>> m.limits = Limits(size=len(m) + 10)
+	>>> m.valueof(('c', 'self')) # doctest: +ELLIPSIS
+	Traceback (most recent call last):
+		...
+	mesh.Exhausted: The limit of size has been reached evaluating ('c', 'self'), at ...
+
+	A definition that never ends is stopped quickly, even with
+	many steps.
+	>>> import stdlib
+	>>> m = stdlib.program('-> len(of: [])', ('base', 'x'))
+	>>> m.limits, start = Limits(steps=100000), time.monotonic()
+	>>> m.valueof(('base', 'x', 'self')) # doctest: +ELLIPSIS
+	Traceback (most recent call last):
+		...
+	mesh.Exhausted: The limit of steps has been reached evaluating ('base', 'x', 'self'), at ...
+	>>> time.monotonic() - start < 10
+	True
+	"""
+	__slots__ = ('steps', 'size', 'deadline')
+
+	def __init__(self, steps: Optional[int] = None, size: Optional[int] = None,
+				 seconds: Optional[float] = None):
+		self.steps = steps
+		self.size = size
+		self.deadline = None if seconds is None else time.monotonic() + seconds
+
+	def check(self, mesh: 'Mesh', path: Tuple[str], at: Tuple[str],
+			  held: int = 0, steps: int = 1):
+		"""
+		This method takes some steps of the evaluation of path,
+		that's looking for at, and raises Exhausted if a limit is
+		reached. Held is how many more values are kept outside of
+		the mesh, that count as keys.
+		"""
+		if self.steps is not None:
+			self.steps -= steps
+			if self.steps < 0:
+				raise Exhausted('steps', path, at, mesh)
+		if self.size is not None and len(mesh) + held > self.size:
+			raise Exhausted('size', path, at, mesh)
+		if self.deadline is not None and time.monotonic() > self.deadline:
+			raise Exhausted('seconds', path, at, mesh)
+
 
 class Mesh(dict):
 	"""
@@ -20,16 +159,144 @@ class Mesh(dict):
 	the context of the variable is also stored, aka from where you
 	should start searching for the variable we're referring to.
 	After binding just the absolute path is left.
+	Natural numbers, strings and lists of numbers written in the code
+	are an exception: they are saved just as an int, a str or a
+	memoryview of ints, both before and after binding. The values
+	of their structure (e.g. `base.nat.pos` and `prev`) are only
+	created when they're needed, one at a time, by Mesh.valueof.
+	In the same way, the values cloned by Mesh.clone are not copied
+	until they're changed: they're read from where they have been
+	cloned from, see Mesh.overlay.
 	"""
 	
+	# How many calls Mesh.recall remembers at most
+	memo = 1 << 12
+	# How many values can be added before Mesh.collect is run
+	threshold = 1 << 16
+	# The functions of std computed natively when their arguments
+	# are literals, see Mesh.intrinsic
+	intrinsics = {
+		('base', 'nat', 'pos', '+'): Intrinsic(operands, (int, int),
+			lambda a, b: a + b),
+		('base', 'nat', 'zero', '+'): Intrinsic(operands, (int, int),
+			lambda a, b: a + b),
+		('base', 'nat', 'pos', '='): Intrinsic(operands, (int, int),
+			lambda a, b: ('base', 'bool', 'true' if a == b else 'false')),
+		('base', 'nat', 'zero', '='): Intrinsic(operands, (int, int),
+			lambda a, b: ('base', 'bool', 'true' if a == b else 'false')),
+		('base', 'list', 'element', '&'): Intrinsic(operands,
+			(memoryview, memoryview), lambda a, b: concat(a[::-1], b)),
+		('base', 'list', 'end', '&'): Intrinsic(operands,
+			(memoryview, memoryview), lambda a, b: b),
+		('base', 'len'): Intrinsic((('of',),), (memoryview,),
+			lambda of: len(of) or None),
+		('base', 'get'): Intrinsic((('item',), ('of',)), (int, memoryview),
+			lambda item, of: of[item] if item < len(of) else None),
+		('base', 'list_sum'): Intrinsic((('of',),), (memoryview,),
+			lambda of: sum(of) if of else None),
+	}
+	operators = {function[-1] for function in intrinsics}
+	
 	# Public:
 	
 	def __init__(self, *args):
 		super().__init__(*args)
+		# The names after each path in the keys, see Mesh.link
+		self.children = defaultdict(set)
+		for key in super().__iter__():
+			self.link(key)
+		# The clones that haven't been copied yet, see Mesh.overlay
+		self.overlays: Dict[Tuple[str], Tuple[Tuple[str], Mapping]] = {}
+		# The paths of the overlays as nested dictionaries, one for
+		# each name, where None marks an overlay, see Mesh.region
+		self.regions: dict = {}
+		self.sources: Dict[Tuple[str], Set[Tuple[str]]] = defaultdict(set)
+		# The paths of the sources, like Mesh.regions
+		self.watched: dict = {}
+		# The results of valueof, see Mesh.valueof
+		self.cache: Dict[Tuple[str], Tuple[str]] = {}
+		# The last calls made with each signature, see Mesh.recall
+		self.calls: Dict[tuple, Tuple[str]] = OrderedDict()
+		# The paths that are going to be used, see Mesh.collect,
+		# and how many values there were after the last collection
+		self.roots: Set[Tuple[str]] = set()
+		self.collected = len(self)
+		# The compiled definitions calls are run with, if any,
+		# see machine.Machine
+		self.machine = None
+		# What the evaluation can take at most, if anything
+		self.limits: Optional[Limits] = None
+		# What evaluates the operands of operators in parallel, if
+		# anything, see parallel.Scheduler
+		self.scheduler = None
+		# What's counted while evaluating, if anything, see
+		# profiler.Profile
+		self.profile = None
+		# Numbers the calls moved next to their caller, see Mesh.tail,
+		# and the first call of the ones each of them was moved from
+		self.moved = count()
+		self.tails: Dict[Tuple[str], Tuple[str]] = {}
+		if args and isinstance(args[0], Mesh):
+			self.machine = args[0].machine
+			for path, overlay in args[0].overlays.items():
+				self.add(path, *overlay)
+	
+	def __missing__(self, key: Tuple[str]):
+		region = self.region(key)
+		if region is None:
+			raise KeyError(key)
+		source, mapping = self.overlays[region]
+		return rebase(self[source + key[len(region):]], mapping)
+	
+	def __contains__(self, key: Tuple[str]) -> bool:
+		if super().__contains__(key):
+			return True
+		region = self.region(key)
+		return (region is not None and
+				self.overlays[region][0] + key[len(region):] in self)
+	
+	def get(self, key: Tuple[str], default=None):
+		try:
+			return self[key]
+		except KeyError:
+			return default
+	
+	def __setitem__(self, key: Tuple[str], value):
+		if key in self.cache:
+			self.change(key, value)
+		if self.overlays:
+			self.settle(key)
+		self.put(key, value)
+	
+	def __delitem__(self, key: Tuple[str]):
+		self.cache.clear()
+		self.calls.clear()
+		if self.overlays:
+			self.settle(key)
+		super().__delitem__(key)
+		self.unlink(key)
+	
+	def setdefault(self, key: Tuple[str], value=None):
+		if key in self:
+			return self[key]
+		self[key] = value
+		return value
+	
+	def update(self, other=()):
+		if self.overlays:
+			for key, value in dict(other).items():
+				self[key] = value
+			return
+		other = dict(other)
+		for key in other:
+			if not super().__contains__(key):
+				self.link(key)
+		super().update(other)
 	
-	def bind(self):
+	def bind(self, keys: Optional[Iterable[Tuple[str]]] = None):
 		"""
-		This binds all the variable in the mesh.
+		This binds all the variable in the mesh, or just the ones
+		with the given keys, if the rest has already been binded.
 		At the beginning, all the variable to bind are put in
 		this notation: (context_path, referring_path). In order to 
 		do this, it look for all the values (different from None),
@@ -52,7 +319,12 @@ class Mesh(dict):
 		`('x', 'a')`
 		`('a',)`
 		If none of this variable exists, an expection will be raised.
+		Instead of trying each of them, the scopes where each name
+		is defined (the keys without their last name) are indexed
+		once, see Mesh.scope, and the scope found for a name from
+		a context is memoized, as many variables share them.
 		A special case is same, the only built-in function.
+		If some keys are given, only their values are binded.
 		
 		>>> m = Mesh({
 		...   ('a',): None,
@@ -89,19 +361,34 @@ class Mesh(dict):
 		Traceback (most recent call last):
 			...
 		SyntaxError: Name 'f' is not defined.
+		
+		>>> m = Mesh({
+		...   ('a',): None,
+		...   ('b',): ('a',),
+		...   ('x',): (('x',), ('b',))
+		... })
+		>>> m.bind([('x',)])
+		>>> m[('x',)]
+		('b',)
 		"""
 		self[('same',)] = None
-		for key, value in self.items():
-			if value is None:
+		scopes = defaultdict(set)
+		for key in self:
+			if key:
+				scopes[key[-1]].add(key[:-1])
+		found = defaultdict(dict)
+		for key in self if keys is None else keys:
+			value = self[key]
+			if not isinstance(value, tuple):
 				continue
 			context, (var, *propr) = value
-			for i in reversed(range(len(context)+1)):
-				possible = context[:i] + (var,)
-				if possible in self:
-					self[key] = possible + tuple(propr)
-					break
-			else:
-				raise SyntaxError(f'Name {var!r} is not defined in {key!r}.')
+			if not context in found[var]:
+				found[var][context] = self.scope(context, scopes.get(var, ()))
+			possible = found[var][context]
+			if possible is None:
+				raise SyntaxError(f'Name {var!r} is not defined in '
+								  f'{self.readable(key)!r}.')
+			self[key] = possible + (var, *propr)
 			
 	def valueof(self, path: Tuple[str], done=()):
 		"""
@@ -123,11 +410,26 @@ class Mesh(dict):
 		`Mesh.chroot(('fib',), ('a', 'b'))` will be called.
 		If even after the chroot the value still does not exist,
 		it will go on, raising an error after `()`.
+		The value of a key that exists is saved in a cache, so that
+		the next time it's found right away, and so is the value of
+		each key on the way to it, so that when they're asked for
+		they're found right away too. The cache is emptied when a
+		value that could change some of them is written, see
+		Mesh.change.
 		Also, if the value to return is a path to another
 		object, it will return the Mesh.valueof(that_path) instead.
 		Finally, if the value is None, the path itself is returned.
+		None of this is done calling valueof again: the paths
+		waiting for the value of another one, and the clones
+		waiting for a value, see Mesh.run, are kept on a stack,
+		so that long chains of values and deep calls are limited
+		only by memory.
 		The done argument represent the already cloned values, in
 		order to avoid them cloning forever.
+		Looking for a value and every call made for it are steps,
+		that are checked against Mesh.limits, see Limits.
+		If the value is a literal saved as an int, a str or a
+		memoryview, it's expanded with Mesh.expand before being used.
 		
 		>>> m = Mesh({
 		...   ('a',): None,
@@ -163,25 +465,1189 @@ class Mesh(dict):
 		('f', 'k')
 		>>> m.valueof(('f', 'k', 'x'))
 		('f', 'k', 'x')
+		
+		>>> m = Mesh({
+		...   ('base', 'nat', 'pos'): None,
+		...   ('base', 'nat', 'zero'): None,
+		...   ('n',): 2,
+		...   ('m',): ('n',)
+		... })
+		>>> m.valueof(('m', 'prev', 'prev'))
+		('base', 'nat', 'zero')
+		>>> m.valueof(('n', 'prev'))
+		('base', 'nat', 'pos')
+		
+		>>> m = Mesh({('x', 0): None})
+		>>> m.update(((('x', i+1), ('x', i)) for i in range(10000)))
+		>>> m.valueof(('x', 10000))
+		('x', 0)
+		>>> m[('x', 0)] = ('x', 10)
+		>>> m.valueof(('x', 20))
+		Traceback (most recent call last):
+			...
+		SyntaxError: Name ('x', 10) is defined as itself.
 		"""
-		if path in self:
-			if isinstance(self[path], tuple):
-				return self.valueof(self[path])
-			assert self[path] is None
+		# What's waiting for the value that's being looked for,
+		# innermost last: the paths whose value is the same, that
+		# are saved in the cache, and the tasks of Mesh.run.
+		stack: List[Union[Tuple[str], Task]] = []
+		# The paths on the stack since the last task, that would
+		# be followed forever if one of them is found again
+		following = set()
+		asked = path
+		if self.limits:
+			self.limits.check(self, asked, path)
+		if self.profile:
+			self.profile.valueof()
+		while True:
+			if path in self.cache:
+				value = self.cache[path]
+			elif path in self:
+				if isinstance(self[path], literals):
+					self.expand(path)
+				value = self[path]
+				if isinstance(value, tuple):
+					if value in following:
+						raise SyntaxError(f'Name {self.readable(value)!r} '
+										  'is defined as itself.')
+					following.add(path)
+					# The path before it on the stack, if there's no
+					# task in between, has its same value: only the
+					# first one is saved in the cache, so that the
+					# others don't keep what they're in from being
+					# removed by Mesh.collect
+					if not stack or isinstance(stack[-1], Task):
+						stack.append(path)
+					path, done = value, ()
+					continue
+				assert value is None
+				value = self.cache[path] = path
+			else:
+				# Before the values it's going to use are read
+				if self.roots and len(self) > self.collected + self.threshold:
+					self.collect(*self.using(stack, path))
+				for i in reversed(range(len(path))):
+					subpath = path[:i]
+					value = self.get(subpath)
+					if value is not None and not (value, subpath) in done:
+						break
+				else:
+					raise SyntaxError(f'Name {self.readable(path)!r} '
+									  'is not defined.')
+				if isinstance(value, literals):
+					self.expand(subpath)
+					continue
+				done += ((value, subpath),)
+				budget = iter(range(64))
+				source = self.recall(value, subpath, budget)
+				if self.limits:
+					self.limits.check(self, asked, path,
+									  steps=65 - length_hint(budget))
+				stack.append(Task(self.calling(source, subpath, path, done),
+								  source, subpath, path))
+				following = set()
+				value = None
+			while stack:
+				waiting = stack.pop()
+				if not isinstance(waiting, Task):
+					self.cache[waiting] = value
+					continue
+				try:
+					path, done = waiting.run.send(value)
+				except StopIteration as stop:
+					if not isinstance(stop.value, Forward):
+						value = stop.value
+						continue
+					path, done = stop.value
+				else:
+					stack.append(waiting)
+				if self.profile:
+					self.profile.lookup(self, waiting, len(stack))
+				following = set()
+				break
+			else:
+				return value
+	
+	def collect(self, roots: Iterable[Tuple[str]],
+				targets: Iterable[Tuple[str]] = ()):
+		"""
+		This method removes the values that can't be used anymore
+		while the roots are read, and something is being cloned
+		to the targets. What can be used is found by Mesh.reach:
+		the targets are used, as the clone could still be using
+		them, but not the calls inside them that nothing uses.
+		Only calls are removed, that is the paths ending with a
+		hidden name, and everything that starts with them: other
+		values, like the arguments or the proprieties of literals,
+		could not be found again, while a call is made again by
+		cloning its function if it's ever used.
+		Before that, the values of Mesh.roots that lead to other
+		values through calls are shortened, see Mesh.shorten, as
+		otherwise a call would be used as long as they are.
+		What the cache of Mesh.valueof and the calls remembered
+		by Mesh.recall say about the removed calls is forgotten.
+		Mesh.valueof runs this method when more than
+		Mesh.threshold values have been added since the last
+		time, with Mesh.roots and what it's evaluating as roots.
+		
+		>>> m = Mesh({
+		...   ('f',): None, ('f', 'x'): None,
+		...   ('c',): None, ('c', 'y'): ('c', '1.', 'x'),
+		...   ('c', '1.'): ('f',), ('c', '1.', 'x'): 1,
+		...   ('c', '2.'): ('f',), ('c', '2.', 'x'): 2,
+		... })
+		>>> m.clone(('c', '2.'), ('c', '3.'))
+		>>> m.collect([('c',)])
+		>>> sorted(m)
+		[('c',), ('c', '1.'), ('c', '1.', 'x'), ('c', 'y'), ('f',), ('f', 'x')]
+		>>> m.overlays
+		{}
+		
+		The source of an overlay that's used is not removed.
+		>>> m.clone(('c', '1.'), ('c', '3.'))
+		>>> m[('c', 'y')] = ('c', '3.', 'x')
+		>>> m.collect([('c',)])
+		>>> sorted(m)[:3], m[('c', '3.', 'x')]
+		([('c',), ('c', '1.'), ('c', '1.', 'x')], 1)
+		>>> m.collect([], [('c',)])
+		>>> m[('c', '3.', 'x')]
+		1
+		
+		A call whose value has been found is not used anymore.
+		>>> m = Mesh({
+		...   ('f',): None, ('f', 'self'): ('f', 'x'), ('f', 'x'): ('g',),
+		...   ('g',): None, ('c',): ('c', '1.', 'self'), ('c', '1.'): ('f',),
+		... })
+		>>> m.valueof(('c',))
+		('g',)
+		>>> m.roots = {('c',)}
+		>>> m.collect([('c',)])
+		>>> [key for key in m if '1.' in key], m[('c',)]
+		([], ('g',))
+		
+		Collecting doesn't change what's found, however often it's done.
+		>>> import stdlib
+		>>> from writer import Writer
+		>>> m, kept = (stdlib.program('-> nat.tests', ('base', 'x'))
+		...            for _ in range(2))
+		>>> m.roots = {key[:2] for key in m if len(key) > 1}
+		>>> m.threshold = 10
+		>>> root = ('base', 'x', 'self')
+		>>> Writer(m).write(root) == Writer(kept).write(root)
+		True
+		>>> m.collected > 0
+		True
+		"""
+		targets = set(targets)
+		reached = self.reach(roots, targets)
+		self.discard(self.unreachable(reached))
+		self.collected = len(self)
+	
+	# Private:
+	
+	def discard(self, calls: List[Tuple[str]]):
+		"""
+		This method removes the calls, and everything that starts
+		with them, for Mesh.collect and Mesh.tail, and forgets what
+		the cache of Mesh.valueof, the calls remembered by
+		Mesh.recall and the calls moved by Mesh.tail say about them.
+		
+		>>> m = Mesh({('c', '1.'): ('f',), ('c', '1.', 'x'): 1, ('c', 'y'): 2})
+		>>> m.cache[('c', 'z')] = ('c', '1.', 'x')
+		>>> m.discard([('c', '1.')])
+		>>> sorted(m), m.cache
+		([('c', 'y')], {})
+		"""
+		for call in calls:
+			keys = [call, *self.outline(call, lambda key: False)]
+			for key in reversed(keys):
+				if key in self.overlays:
+					self.remove(key)
+				if super().__contains__(key):
+					super().__delitem__(key)
+				self.unlink(key)
+		if not calls:
+			return
+		removed: dict = {}
+		for call in calls:
+			mark(removed, call)
+		gone = lambda path: (isinstance(path, tuple) and
+							 next(marks(removed, path, False), None) is not None)
+		self.cache = {path: value for path, value in self.cache.items()
+					  if not gone(path) and not gone(value)}
+		for signature in [signature for signature, call
+						  in self.calls.items() if gone(call)]:
+			del self.calls[signature]
+		self.tails = {moved: first for moved, first in self.tails.items()
+					  if not gone(moved) and not gone(first)}
+	
+	def scope(self, context: Tuple[str], scopes: Set[Tuple[str]]):
+		"""
+		This method returns the innermost of the given scopes
+		that contains the context, or None if there's none.
+		If there are less scopes than outer contexts, each scope
+		is checked, otherwise each outer context is searched.
+		
+		>>> Mesh.scope(None, ('a', 'b', 'c'), {('a',), ('a', 'b'), ('x',)})
+		('a', 'b')
+		>>> Mesh.scope(None, ('a', 'b', 'c'), {('x',)})
+		>>> Mesh.scope(None, ('a',), {(), ('b',), ('c',), ('d',)})
+		()
+		"""
+		if len(scopes) > len(context):
+			for i in reversed(range(len(context)+1)):
+				if context[:i] in scopes:
+					return context[:i]
+			return None
+		innermost = None
+		for scope in scopes:
+			if (context[:len(scope)] == scope and
+				(innermost is None or len(scope) > len(innermost))):
+				innermost = scope
+		return innermost
+	
+	def change(self, key: Tuple[str], value):
+		"""
+		This method is called before the value of a key in the cache
+		of Mesh.valueof is changed, and empties the cache if the new
+		value could change what's in it. That's not the case if it's
+		the same value, if a literal is expanded, and if the new value
+		is the value of the old one, as the path to follow is just
+		shorter. If the key is not in the cache, no value in the cache
+		has been found going through it, so it doesn't matter.
+		The calls of Mesh.recall are forgotten too, as their
+		arguments could have changed.
+		
+		>>> m = Mesh({('a',): ('b',), ('b',): ('c',), ('c',): None})
+		>>> m.valueof(('a',))
+		('c',)
+		>>> m[('a',)] = ('c',)
+		>>> m.cache[('a',)]
+		('c',)
+		>>> m[('c',)] = ('a',)
+		>>> m.cache
+		{}
+		"""
+		old = self[key]
+		if not (old == value or isinstance(old, literals) or
+				(isinstance(old, tuple) and self.get(old) == value)):
+			self.cache.clear()
+			self.calls.clear()
+
+	def readable(self, path: Tuple[str]) -> Tuple[str]:
+		"""
+		This method returns path with what's called after the
+		hidden name of each call, like `1.+` for the call of an
+		operator or `2.len` for a call to len, as the hidden names
+		alone don't say where they are in the code. It's used by
+		the error messages, as the path is not a key anymore.
+		
+		>>> m = Mesh({('a', '1.'): ('a', '1.', 'args', 'value', '+'),
+		...           ('a', '1.', 'args', 'value', '2.'): (('a',), ('len',))})
+		>>> m.readable(('a', '1.', 'args', 'value', '2.', 'of'))
+		('a', '1.+', 'args', 'value', '2.len', 'of')
+		"""
+		names = []
+		for i, name in enumerate(path):
+			if isinstance(name, str) and name.endswith('.'):
+				value = self.get(path[:i+1])
+				# Before binding, the value is a context and a variable
+				if isinstance(value, tuple) and isinstance(value[0], tuple):
+					value = value[1]
+				if isinstance(value, tuple) and value:
+					name = f'{name}{value[-1]}'
+			names.append(name)
+		return tuple(names)
+	
+	def recall(self, function: Tuple[str], call: Tuple[str],
+			   budget: Iterator = None) -> Tuple[str]:
+		"""
+		This method returns what to clone to call, whose value is
+		function, when evaluating it. If a call with the same
+		signature (see Mesh.signature) has been evaluated before,
+		it's the same as cloning the function again, but what's
+		already been found out in the old call is not found out
+		again, so the old call is returned. Otherwise, the call is
+		remembered and the function is returned. Values without
+		arguments are just the function, and are not remembered.
+		Only the last Mesh.memo signatures are remembered, the
+		one that's been used least recently is forgotten first.
+		The budget is given to Mesh.signature.
+		
+		>>> m = Mesh({
+		...   ('f',): None,
+		...   ('a',): ('f',), ('a', 'n'): 3,
+		...   ('b',): ('f',), ('b', 'n'): ('a', 'n'),
+		...   ('c',): ('f',), ('c', 'n'): 4,
+		... })
+		>>> m.recall(('f',), ('a',))
+		('f',)
+		>>> m.recall(('f',), ('b',))
+		('a',)
+		>>> m.recall(('f',), ('c',))
+		('f',)
+		"""
+		if not self.names(call):
+			return function
+		signature = self.signature(function, call, budget)
+		if signature is None:
+			return function
+		old = self.calls.get(signature)
+		if old is None or old == call or related(old, call) or not old in self:
+			self.calls[signature] = call
+			self.calls.move_to_end(signature)
+			while len(self.calls) > self.memo:
+				self.calls.popitem(last=False)
+			return function
+		self.calls.move_to_end(signature)
+		return old
+	
+	def signature(self, function: Tuple[str], call: Tuple[str],
+				  budget: Iterator = None) -> Optional[Normal]:
+		"""
+		This method returns what a call, whose value is function,
+		depends on: what the function is, and what each of its
+		arguments is, see Mesh.normal. The function can also be
+		a literal that has some proprieties of its own. Two calls with the same
+		signature have the same value. If that can't be found
+		out without evaluating anything, None is returned.
+		
+		>>> m = Mesh({('f',): None, ('a',): ('f',), ('a', 'n'): 3})
+		>>> m.signature(('f',), ('a',))
+		(('f',), (('n', 3),))
+		>>> m[('a', 'k')] = ('z',)
+		>>> m.signature(('f',), ('a',))
+		"""
+		budget = budget or iter(range(64))
+		arguments = []
+		for name in sorted(self.names(call)):
+			arguments.append((name, self.normal(call + (name,), budget)))
+			if arguments[-1][1] is None:
+				return None
+		if isinstance(function, tuple):
+			function = self.normal(function, budget)
+		elif isinstance(function, memoryview):
+			function = function.tobytes()
+		return None if function is None else (function, tuple(arguments))
+	
+	def normal(self, path: Tuple[str], budget: Iterator = None) -> Optional[Normal]:
+		"""
+		This method returns what the value of path is, without
+		evaluating it, so that values can be compared:
+		- values that are just another path are followed.
+		- literals are returned as they are, after following
+		the proprieties they have as literals, e.g. `prev` of
+		a number, and memoryviews are returned as bytes.
+		- values with proprieties of their own are returned as
+		their signature, see Mesh.signature, as they're made
+		in the same way as a call.
+		- a path that's None is returned as it is.
+		If the path goes on after the value that's been found,
+		e.g. the value of a call, a couple of the value and the
+		rest of the path is returned. If the path doesn't exist,
+		or it takes more steps than the budget, None is returned.
+		
+		>>> m = Mesh({
+		...   ('a',): None, ('a', 'x'): None,
+		...   ('b',): ('a',), ('c',): ('b', 'x'),
+		...   ('n',): 3, ('m',): ('n', 'prev', 'prev'),
+		...   ('l',): memoryview(array('q', [1, 2])),
+		...   ('k',): ('l', 'next', 'value'),
+		...   ('s',): 'hi',
+		...   ('f',): ('a',), ('f', 'y'): ('m',),
+		... })
+		>>> m.normal(('c',))
+		('a', 'x')
+		>>> m.normal(('m',))
+		1
+		>>> m.normal(('k',))
+		2
+		>>> m.normal(('s',))
+		'hi'
+		>>> m.normal(('n', 'prev', 'prev', 'prev', 'prev'))
+		(0, ('prev',))
+		>>> m.normal(('f', 'self'))
+		((('a',), (('y', 1),)), ('self',))
+		>>> m.normal(('b', 'y'))
+		"""
+		budget = budget or iter(range(64))
+		for _ in budget:
+			i = len(path)
+			while i and not path[:i] in self:
+				i -= 1
+			if not i:
+				return None
+			value, rest = self[path[:i]], path[i:]
+			names = self.names(path[:i])
+			if value is None:
+				return None if rest else path
+			if isinstance(value, tuple) and not names:
+				path = value + rest
+				continue
+			if names:
+				value = self.signature(value, path[:i], budget)
+				if value is None:
+					return None
+			else:
+				while rest and literal(value, rest[0]) is not None:
+					value, rest = literal(value, rest[0]), rest[1:]
+				if isinstance(value, memoryview):
+					value = value.tobytes()
+			return (value, rest) if rest else value
+		return None
+	
+	def intrinsic(self, function: Tuple[str], call: Tuple[str],
+				  delta: dict, done) -> Generator:
+		"""
+		This task is run by Mesh.clone when function is one of
+		Mesh.intrinsics, like `+` of `base.nat` or `len`. If
+		all its arguments are literals, see Mesh.number and
+		Mesh.packed, the value of the call is computed in python
+		and saved to delta as call.self, instead of following
+		the function one step at a time. Otherwise nothing is
+		done, and the function is evaluated as usual.
+		
+		>>> m = Mesh({
+		...   ('base', 'nat', 'pos'): None, ('base', 'nat', 'zero'): None,
+		...   ('base', 'nat', 'pos', '+'): None, ('base', 'len'): None,
+		...   ('c',): ('base', 'nat', 'pos', '+'),
+		...   ('c', 'args', 'value'): 2, ('c', 'args', 'next', 'value'): 3,
+		...   ('l',): ('base', 'len'), ('l', 'of'): memoryview(array('q', [4, 5])),
+		... })
+		>>> m.clone(('base', 'nat', 'pos', '+'), ('c',))
+		>>> m.clone(('base', 'len'), ('l',))
+		>>> m[('c', 'self')], m[('l', 'self')]
+		(5, 2)
+		"""
+		intrinsic = self.intrinsics[function]
+		values = []
+		for argument, kind in zip(intrinsic.arguments, intrinsic.types):
+			read = self.number if kind is int else self.packed
+			value = read(call + argument)
+			if value is None:
+				yield call + argument, done
+				value = read(call + argument)
+				if value is None:
+					return
+			values.append(value)
+		value = intrinsic.compute(*values)
+		if value is not None:
+			delta[call+('self',)] = value
+	
+	def operator(self, path: Tuple[str], done) -> Generator:
+		"""
+		This task returns the function that path is, if it's one
+		of Mesh.intrinsics, like `+` of a number, or None. The
+		literal is evaluated, but it's not cloned to, as it would
+		be to find its proprieties: the function is the one of
+		its structure, unless something it's made from has its own.
+		
+		>>> m = Mesh({
+		...   ('base', 'nat', 'pos'): None, ('base', 'nat', 'pos', '+'): None,
+		...   ('a',): ('b',), ('b',): 2, ('c',): ('d',), ('d',): 2,
+		...   ('d', '+'): None,
+		... })
+		>>> m.run(m.operator(('a', '+'), ())), m.run(m.operator(('c', '+'), ()))
+		(('base', 'nat', 'pos', '+'), None)
+		"""
+		if not path[-1] in self.operators:
+			return None
+		yield path[:-1], done
+		path, name = path[:-1], path[-1]
+		for _ in range(64):
+			if name in self.names(path):
+				return None
+			value = self.get(path)
+			if isinstance(value, literals):
+				value = structure(value)
+			function = value + (name,) if isinstance(value, tuple) else None
+			if function in self.intrinsics:
+				return function
+			if not isinstance(value, tuple) or self.get(value) is None:
+				return None
+			path = value
+		return None
+	
+	def number(self, path: Tuple[str]) -> Optional[int]:
+		"""
+		This method returns the number that path is, if it can
+		be found without evaluating anything: following the
+		values that are just another path, until an int or
+		`base.nat.zero` is found, and the `prev` of each
+		`base.nat.pos`. Otherwise, or if it takes too many
+		steps, None is returned.
+		
+		>>> m = Mesh({
+		...   ('a',): ('b', 'prev'), ('b',): ('base', 'nat', 'pos'),
+		...   ('b', 'prev'): ('c',), ('c',): 4,
+		...   ('d',): ('base', 'nat', 'zero'), ('e',): ('f',), ('f',): None,
+		... })
+		>>> m.number(('a',)), m.number(('b',)), m.number(('d',)), m.number(('e',))
+		(4, 5, 0, None)
+		"""
+		n = 0
+		for _ in range(64):
+			value = self.get(path)
+			if isinstance(value, int):
+				return n + value
+			if value == ('base', 'nat', 'zero'):
+				return n
+			if value == ('base', 'nat', 'pos'):
+				n += 1
+				path += ('prev',)
+			elif isinstance(value, tuple):
+				path = value
+			else:
+				return None
+		return None
+	
+	def known(self, path: Tuple[str]):
+		"""
+		This method returns what can be the value of a key instead
+		of path, found without evaluating anything: the number
+		that path is, if Mesh.number finds it, maybe after some
+		`succ` and `prev`, or otherwise the last of the paths that
+		path leads to, each one the value of the one before, if
+		that's a key inside a call, with nothing that starts
+		with it, that can be replaced by its value like in
+		Mesh.shorten. A key that a path has been cloned to, and
+		that's not a call, is replaced by that path too, if
+		nothing has been written in it since, as the overlay
+		shows just what's in that path.
+		
+		>>> m = Mesh({
+		...   ('c', '1.', 'a'): ('c', '1.', 'n', 'succ'), ('c', '1.', 'n'): 2,
+		...   ('c', '1.', 'x'): ('c', '1.', 'y'), ('c', '1.', 'y'): ('l',),
+		...   ('l',): ('base', 'list', 'element'), ('l', 'next'): ('l',),
+		... })
+		>>> m.known(('c', '1.', 'a')), m.known(('c', '1.', 'x'))
+		(3, ('l',))
+		>>> m.known(('l', 'next')), m.known(('c', '1.', 'n', 'prev', 'prev', 'prev'))
+		(('l', 'next'), ('c', '1.', 'n', 'prev', 'prev', 'prev'))
+		>>> m.clone(('l',), ('c', '1.', 'y'))
+		>>> m.known(('c', '1.', 'y', 'next'))
+		('l', 'next')
+		"""
+		for _ in range(64):
+			region = self.region(path, strict=False)
+			if region is not None and not region[-1].endswith('.'):
+				source, mapping = self.overlays[region]
+				if mapping == ((source, region),):
+					path = source + path[len(region):]
+					continue
+			value = self.get(path)
+			if not (isinstance(value, tuple) and hidden(path) and
+					not self.names(path)):
+				break
+			path = value
+		i = len(path)
+		while i and path[i-1] in ('succ', 'prev'):
+			i -= 1
+		number = self.number(path[:i])
+		if number is None:
 			return path
-		for i in reversed(range(len(path))):
-			subpath = path[:i]
-			if not subpath in self or self[subpath] is None:
+		for name in path[i:]:
+			if name == 'prev' and not number:
+				return path
+			number += 1 if name == 'succ' else -1
+		return number
+	
+	def packed(self, path: Tuple[str]) -> Optional[memoryview]:
+		"""
+		This method returns the list of numbers that path is, as
+		a memoryview, if it can be found without evaluating
+		anything, like Mesh.number: following the values that
+		are just another path, until a memoryview or
+		`base.list.end` is found, and the `next` of each
+		`base.list.element`, whose value must be a number that
+		fits in 64 bits.
+		
+		>>> m = Mesh({
+		...   ('a',): ('base', 'list', 'element'), ('a', 'value'): 1,
+		...   ('a', 'next'): ('b',), ('b',): memoryview(array('q', [2, 3])),
+		...   ('e',): ('base', 'list', 'end'), ('x',): 4,
+		... })
+		>>> m.packed(('a',)).tolist(), m.packed(('e',)).tolist(), m.packed(('x',))
+		([1, 2, 3], [], None)
+		>>> m[('a', 'value')] = 1 << 64
+		>>> m.packed(('a',))
+		"""
+		items = array('q')
+		for _ in range(64):
+			value = self.get(path)
+			if isinstance(value, memoryview):
+				return concat(memoryview(items), value) if items else value
+			if value == ('base', 'list', 'end'):
+				return memoryview(items)
+			if value == ('base', 'list', 'element'):
+				item = self.number(path + ('value',))
+				if item is None or not -1 << 63 <= item < 1 << 63:
+					return None
+				items.append(item)
+				path += ('next',)
+			elif isinstance(value, tuple):
+				path = value
+			else:
+				return None
+		return None
+	
+	def string(self, path: Tuple[str]) -> Optional[str]:
+		"""
+		This method returns the str that path is, if it can be
+		found without evaluating anything, like Mesh.number:
+		following the values that are just another path, until
+		a str or `base.string` is found, whose characters must
+		be a list Mesh.packed can find.
+		
+		>>> m = Mesh({
+		...   ('a',): ('b',), ('b',): 'hi', ('c',): ('base', 'string'),
+		...   ('c', 'characters'): memoryview(array('q', [104, 105])),
+		...   ('x',): 4,
+		... })
+		>>> m.string(('a',)), m.string(('c',)), m.string(('x',))
+		('hi', 'hi', None)
+		"""
+		for _ in range(64):
+			value = self.get(path)
+			if isinstance(value, str):
+				return value
+			if value == ('base', 'string'):
+				characters = self.packed(path + ('characters',))
+				if characters is None or not all(
+						0 <= c < 0x110000 for c in characters):
+					return None
+				return ''.join(map(chr, characters))
+			if isinstance(value, tuple):
+				path = value
+			else:
+				return None
+		return None
+	
+	def reach(self, roots: Iterable[Tuple[str]],
+			  targets: Set[Tuple[str]] = frozenset()) -> Set[Tuple[str]]:
+		"""
+		This method returns the paths that can be used while the
+		roots and the targets are read, and the paths they start
+		with, that are kept for them. A path can be used if it's a
+		root or a target, or the value of one that can be used, or
+		the source of an overlay one of them is in, or what the
+		overlay maps the values of the source to, or the call it
+		starts with, if it's not a key, as Mesh.valueof would clone
+		it to find it. If a path can be used, so can everything
+		that starts with it, but the calls: they're used only if
+		one of the others is, as their copies are too when they're
+		cloned. The values are shortened on the way, see
+		Mesh.shorten, but not inside the targets.
+		
+		>>> m = Mesh({
+		...   ('a',): ('b', 'x'), ('b',): ('c',), ('c',): None,
+		...   ('a', 'k'): ('a', '2.', 'self'), ('a', '1.'): None,
+		...   ('a', '2.'): None, ('a', '2.', 'self'): None,
+		... })
+		>>> sorted(m.reach([('a',)]))
+		[(), ('a',), ('a', '2.'), ('a', '2.', 'self'), ('a', 'k'), ('b',), ('b', 'x'), ('c',)]
+		
+		What's in the call a path is in is not used for it.
+		>>> m = Mesh({
+		...   ('a',): ('c', '1.', 'self'), ('c',): None, ('c', '1.'): ('f',),
+		...   ('c', '1.', 'self'): None, ('c', '1.', 'x'): ('c', '1.', '2.', 'self'),
+		...   ('c', '1.', '2.', 'self'): None, ('f',): None,
+		... })
+		>>> sorted(key for key in m.reach([('a',)]) if '2.' in key)
+		[]
+		"""
+		used: Set[Tuple[str]] = set()
+		kept: Set[Tuple[str]] = set()
+		blocked = lambda key: key[-1].endswith('.') or key in used
+		todo = [(path, True) for path in (*roots, *targets)]
+		while todo:
+			path, use = todo.pop()
+			if path in used or not use and path in kept:
 				continue
-			if (self[subpath], subpath) in done:
+			(used if use else kept).add(path)
+			if path:
+				todo.append((path[:-1], False))
+			region = self.region(path, strict=False)
+			if region is not None:
+				source, mapping = self.overlays[region]
+				todo.append((source + path[len(region):], use))
+				todo.extend((new, use) for old, new in mapping)
+			if not use:
 				continue
-			oldvalue = self[subpath]
-			done += ((oldvalue, subpath),)
-			self.clone(self[subpath], subpath, done)
-			return self.valueof(path, done)
-		raise SyntaxError(f'Name {path!r} is not defined.')
+			if super().__contains__(path):
+				value = self.shorten(path, targets)
+			elif path in self:
+				value = self.get(path)
+			else:
+				i = len(path) - 1
+				while i and self.get(path[:i]) is None:
+					i -= 1
+				todo.append((path[:i], True))
+				value = None
+			if isinstance(value, tuple):
+				todo.append((value, True))
+			for key in self.outline(path, blocked):
+				if key[-1].endswith('.'):
+					continue
+				used.add(key)
+				if key in self.overlays:
+					source, mapping = self.overlays[key]
+					todo.append((source, True))
+					todo.extend((new, True) for old, new in mapping)
+				value = self.shorten(key, targets) if super().__contains__(key) else None
+				if isinstance(value, tuple):
+					todo.append((value, True))
+		return used | kept
 	
-	# Private:
+	def shorten(self, key: Tuple[str], targets: Set[Tuple[str]]):
+		"""
+		This method returns the value of key, after making it the
+		value at the end of the paths it leads to through calls,
+		if it's one of Mesh.roots. Each path on the way must be a
+		key inside a call, maybe shown by an overlay, with nothing
+		that starts with it: cloning it to key would just give key
+		its value, so its value is the same, and so is the value
+		of what starts with key. This way, the calls on the way
+		are not used by key. The keys inside calls are left alone,
+		as they could be inside the copy of a function that is
+		cloned again, where the path would lead somewhere else,
+		and so are the paths inside the targets, as they could be
+		written when their clone is done.
+		
+		>>> m = Mesh({
+		...   ('c',): ('c', '1.', 'self'), ('c', '1.', 'self'): ('c', '1.', 'x'),
+		...   ('c', '1.', 'x'): 3, ('c', '2.', 'self'): ('f',), ('f',): None,
+		...   ('c', '3.', 'y'): ('c', '2.', 'self'), ('d',): ('c', '2.', 'self'),
+		... })
+		>>> m.roots = {('c',), ('d',)}
+		>>> m.shorten(('c',), set()), m.shorten(('c', '3.', 'y'), set())
+		(3, ('c', '2.', 'self'))
+		>>> m.shorten(('d',), {('c', '2.')})
+		('c', '2.', 'self')
+		>>> m.shorten(('d',), set())
+		('f',)
+		"""
+		value = super().get(key)
+		if not isinstance(value, tuple) or not key in self.roots:
+			return value
+		for _ in range(64):
+			if not (isinstance(value, tuple) and hidden(value) and
+					value in self and not value in self.overlays and
+					not self.names(value) and not inside(value, targets)):
+				break
+			following = self[value]
+			if following is None:
+				break
+			value = following
+		if value != super().__getitem__(key):
+			super().__setitem__(key, value)
+		return value
+	
+	def using(self, stack: List[Union[Tuple[str], Task]],
+			  path: Tuple[str]) -> Tuple[Set[Tuple[str]], List[Tuple[str]]]:
+		"""
+		This method returns the roots and the targets that
+		Mesh.valueof passes to Mesh.collect, when its stack is
+		the given one and it's looking for the value of path.
+		The paths on the stack are read, and so are Mesh.roots
+		and the paths the tasks are looking for. The tasks that
+		are still cloning, as they're not waiting for their own
+		path yet, read their source and write their target.
+		"""
+		roots, targets = set(self.roots), []
+		for waiting, after in zip(stack, [*stack[1:], path]):
+			if not isinstance(waiting, Task):
+				roots.add(waiting)
+				continue
+			roots.add(waiting.path)
+			if (after.path if isinstance(after, Task) else after) != waiting.path:
+				roots.add(waiting.source)
+				targets.append(waiting.target)
+		roots.add(path)
+		return roots, targets
+	
+	def unreachable(self, reached: Set[Tuple[str]]) -> List[Tuple[str]]:
+		"""
+		This method returns the calls that can't be used, given
+		the paths that can be, found by Mesh.reach.
+		"""
+		calls = []
+		stack = [()]
+		while stack:
+			path = stack.pop()
+			if path and path[-1].endswith('.') and not path in reached:
+				calls.append(path)
+				continue
+			stack.extend(path + (name,) for name in self.children.get(path, ()))
+		return calls
+	
+	def put(self, key: Tuple[str], value):
+		"This method sets a value, without looking at the overlays."
+		if not super().__contains__(key):
+			self.link(key)
+		super().__setitem__(key, value)
+	
+	def link(self, key: Tuple[str]):
+		"""
+		The keys of the mesh are also saved as a tree, where
+		each path has the set of the names that follow it in
+		some key. This way, the keys starting with a path can
+		be found without looking at all the others, see
+		Mesh.subtree. This method adds a key to the tree.
+		
+		>>> m = Mesh({('a', 'b', 'c'): None})
+		>>> m.children[()], m.children[('a',)], m.children[('a', 'b')]
+		({'a'}, {'b'}, {'c'})
+		>>> m[('a', 'x')] = None
+		>>> sorted(m.children[('a',)])
+		['b', 'x']
+		"""
+		while key:
+			names = self.children[key[:-1]]
+			if key[-1] in names:
+				return
+			names.add(key[-1])
+			key = key[:-1]
+	
+	def unlink(self, key: Tuple[str]):
+		"""
+		This method removes a key from the tree, together
+		with the paths before it that aren't keys and are
+		not followed by anything else.
+		
+		>>> m = Mesh({('a', 'b', 'c'): None, ('a', 'x'): None})
+		>>> del m[('a', 'b', 'c')]
+		>>> sorted(m.children[('a',)])
+		['x']
+		>>> del m[('a', 'x')]
+		>>> m.children[()]
+		set()
+		"""
+		while (key and not super().__contains__(key) and
+			   not key in self.overlays and not self.children.get(key)):
+			self.children.pop(key, None)
+			self.children[key[:-1]].discard(key[-1])
+			key = key[:-1]
+	
+	def subtree(self, root: Tuple[str], blocked=lambda key: False):
+		"""
+		This generator yields the keys that start with root,
+		without root itself, sorted. The keys for which blocked
+		is true are skipped, together with all the keys starting
+		with them, without even looking at them.
+		
+		>>> m = Mesh({('a',): None, ('a', 'b', 'c'): None,
+		...           ('a', 'x'): None, ('b',): None})
+		>>> [*m.subtree(('a',))]
+		[('a', 'b', 'c'), ('a', 'x')]
+		>>> [*m.subtree(())]
+		[('a',), ('a', 'b', 'c'), ('a', 'x'), ('b',)]
+		>>> [*m.subtree((), lambda key: key == ('a',))]
+		[('b',)]
+		"""
+		stack = [root]
+		while stack:
+			path = stack.pop()
+			if path != root and path in self:
+				if blocked(path):
+					continue
+				yield path
+			stack.extend(path + (name,) for name in
+						 sorted(self.names(path), reverse=True))
+	
+	def overlay(self, source: Tuple[str], newroot: Tuple[str], mapping: Mapping):
+		"""
+		Cloning a path into another one copies all the values
+		that start with it, but almost none of them is ever used.
+		So, instead of copying them, this method adds an overlay
+		on newroot, saying that the values that start with newroot
+		are the ones that start with source, changed by rebase
+		with the given mapping. They're found when they are needed
+		by __missing__, and they are copied only when something
+		that would change them is written, see Mesh.settle.
+		What already starts with newroot stays, and blocks what
+		the overlay shows like in clone, so the overlay is split
+		until it doesn't contain any of it.
+		The source and newroot must not start with each other,
+		and no overlay must be showing anything that starts with
+		newroot, see Mesh.shown.
+		
+		>>> m = Mesh({('f', 'a'): 1, ('f', 'b', 'c'): ('f', 'a'),
+		...           ('x', 'a'): ('k',)})
+		>>> m.overlay(('f',), ('x',), ((('f',), ('x',)),))
+		>>> m[('x', 'a')], m[('x', 'b', 'c')], len(m)
+		(('k',), ('x', 'a'), 3)
+		>>> ('x', 'b') in m, ('x', 'b', 'c') in m, ('x', 'd') in m
+		(False, True, False)
+		
+		Writing anything starting with f copies the values first.
+		>>> m[('f', 'b', 'c')] = None
+		>>> m[('x', 'b', 'c')], m[('f', 'b', 'c')]
+		(('x', 'a'), None)
+		"""
+		self.settle(newroot)
+		if newroot in self.overlays:
+			self.split(newroot)
+		self.add(newroot, source, mapping)
+		if self.children.get(newroot):
+			self.split(newroot)
+	
+	def shown(self, path: Tuple[str]) -> bool:
+		"""
+		This method checks if any overlay shows something that
+		starts with path, as it would change if something was
+		added there.
+		
+		>>> m = Mesh({})
+		>>> m.add(('x',), ('f', 'g'), ())
+		>>> m.shown(('f',)), m.shown(('f', 'g', 'h')), m.shown(('f', 'k'))
+		(True, True, False)
+		"""
+		node = self.watched
+		for name in path:
+			if None in node:
+				return True
+			if not name in node:
+				return False
+			node = node[name]
+		return bool(node)
+	
+	def outline(self, root: Tuple[str], blocked) -> Iterable[Tuple[str]]:
+		"""
+		This generator yields the keys that start with root, like
+		Mesh.subtree, but it does not look inside the overlays:
+		the paths of the overlays are yielded instead. If root
+		is inside an overlay, nothing is yielded.
+		
+		>>> m = Mesh({('f', 'a'): 1, ('f', 'b', 'c'): 2, ('g', 'x'): 3})
+		>>> m.add(('f', 'd'), ('g',), ())
+		>>> [*m.outline(('f',), lambda key: False)]
+		[('f', 'a'), ('f', 'b', 'c'), ('f', 'd')]
+		"""
+		stack = [root]
+		while stack:
+			path = stack.pop()
+			if path != root:
+				if super().__contains__(path):
+					if blocked(path):
+						continue
+					yield path
+				if path in self.overlays:
+					yield path
+					continue
+			stack.extend(path + (name,) for name in
+						 sorted(self.children.get(path, ()), reverse=True))
+	
+	def copy_subtree(self, source: Tuple[str], newroot: Tuple[str],
+					 mapping: Mapping, delta: dict, overlays: list,
+					 top: Optional[Tuple[str]] = None):
+		"""
+		This method clones source into newroot, when an overlay
+		can't be used, because source and newroot start with each
+		other. The keys are added to delta, but the overlays that
+		start with source become new overlays on newroot, added to
+		overlays, if they don't show anything starting with newroot.
+		Otherwise, they are copied in the same way. The same goes
+		for the keys that other keys start with: only those on the
+		way to newroot, or to what it shows, have to be copied, and
+		the others are shown by an overlay, so that what's inside
+		them is only copied if it's needed.
+		
+		>>> m = Mesh({('a', 'b', 'c'): ('a', 'b'), ('g', 'h'): 1})
+		>>> m.add(('a', 'b', 'd'), ('g',), ())
+		>>> delta, overlays = {}, []
+		>>> m.copy_subtree(('a', 'b'), ('a',), ((('a', 'b'), ('a',)),), delta, overlays)
+		>>> delta
+		{('a', 'c'): ('a', 'b')}
+		>>> overlays
+		[(('g',), ('a', 'd'), ((('a', 'b'), ('a',)),))]
+		
+		>>> m = Mesh({('f', 'g'): None, ('f', 'g', 'h'): 1, ('f', 'x'): None})
+		>>> delta, overlays = {}, []
+		>>> m.copy_subtree(('f',), ('f', 'x'), ((('f',), ('f', 'x')),), delta, overlays)
+		>>> delta
+		{('f', 'x', 'g'): None, ('f', 'x', 'x'): None}
+		>>> overlays
+		[(('f', 'g'), ('f', 'x', 'g'), ((('f',), ('f', 'x')),))]
+		"""
+		top = top or newroot
+		# A key is blocked when its new key already has a value:
+		# then the keys starting with it are not cloned either.
+		move = lambda key: newroot + key[len(source):]
+		blocked = lambda key: self.get(move(key)) is not None
+		shown = None
+		for path in self.outline(source, blocked):
+			if shown is not None and path[:len(shown)] == shown:
+				continue
+			if super().__contains__(path):
+				delta[move(path)] = rebase(self[path], mapping)
+				if (self.children.get(path) and not path in self.overlays
+						and not related(path, top)
+						and not related(path, move(path))
+						and not self.shown(move(path))):
+					overlays.append((path, move(path), mapping))
+					shown = path
+					continue
+			if path in self.overlays:
+				old, more = self.resolve(path)
+				if related(old, top) or self.shown(move(path)):
+					self.copy_subtree(old, move(path), more + mapping, delta, overlays, top)
+				else:
+					overlays.append((old, move(path), more + mapping))
+	
+	def resolve(self, path: Tuple[str]) -> Tuple[Tuple[str], Mapping]:
+		"""
+		This method returns where the values starting with path
+		come from, if path has an overlay or is inside one, and
+		the mapping to give to rebase to have them, so that an
+		overlay of an overlay can skip it.
+		
+		>>> m = Mesh({('f', 'g', 'a'): ('f', 'b')})
+		>>> m.add(('x',), ('f',), ((('f',), ('x',)),))
+		>>> m.resolve(('x', 'g'))
+		(('f', 'g'), ((('f',), ('x',)),))
+		>>> m.resolve(('f', 'g'))
+		(('f', 'g'), ())
+		"""
+		mapping = ()
+		region = self.region(path, strict=False)
+		while region is not None:
+			source, more = self.overlays[region]
+			path, mapping = source + path[len(region):], more + mapping
+			region = self.region(path, strict=False)
+		return path, mapping
+	
+	def add(self, region: Tuple[str], source: Tuple[str], mapping: Mapping):
+		"""
+		This method adds an overlay on region showing source,
+		where the values are changed with rebase and mapping.
+		"""
+		self.overlays[region] = (source, mapping)
+		mark(self.regions, region)
+		if not source in self.sources:
+			mark(self.watched, source)
+		self.sources[source].add(region)
+		self.link(region)
+	
+	def remove(self, region: Tuple[str]) -> Tuple[Tuple[str], Mapping]:
+		"""
+		This method removes the overlay on region, and returns
+		its source and mapping.
+		"""
+		source, mapping = self.overlays.pop(region)
+		unmark(self.regions, region)
+		self.sources[source].discard(region)
+		if not self.sources[source]:
+			del self.sources[source]
+			unmark(self.watched, source)
+		return source, mapping
+	
+	def region(self, key: Tuple[str], strict: bool = True) -> Optional[Tuple[str]]:
+		"""
+		This method returns the path with an overlay that the
+		key starts with, if there's one. If strict is false,
+		the key itself can be the path with the overlay.
+		Overlays never start with each other, so there's only
+		one of them.
+		"""
+		for i in marks(self.regions, key, strict):
+			return key[:i]
+		return None
+	
+	def names(self, path: Tuple[str]) -> Iterable[str]:
+		"""
+		This method returns the names after path in the keys,
+		including the ones that are shown by an overlay.
+		"""
+		region = self.region(path, strict=False)
+		if region is None:
+			return self.children.get(path, ())
+		return self.names(self.overlays[region][0] + path[len(region):])
+	
+	def split(self, region: Tuple[str]):
+		"""
+		This method copies the values of an overlay whose path
+		is just one name longer than the overlay path, like clone
+		would do. The values starting with them are shown by new
+		overlays, one for each of them, unless they already had
+		a value, that blocks them like in clone. Overlays never
+		contain a key or another overlay, so if anything starts
+		with one of them, it's split again, and so is the overlay
+		that was already there, if any.
+		"""
+		source, mapping = self.remove(region)
+		for name in sorted(self.names(source)):
+			old, new = source + (name,), region + (name,)
+			if old in self:
+				if super().get(new) is not None:
+					continue
+				if new in self.cache:
+					self.cache.clear()
+				self.put(new, rebase(self[old], mapping))
+			if self.names(old):
+				if new in self.overlays:
+					self.split(new)
+				self.add(new, old, mapping)
+				if self.children.get(new):
+					self.split(new)
+	
+	def settle(self, key: Tuple[str]):
+		"""
+		This method is called before a value is written, so that
+		what the overlays show doesn't change, except for the new
+		value. The overlays that the key starts with are split,
+		so that the key can be written. Then, the overlays that
+		show the key are split, so that they keep the old value.
+		"""
+		region = self.region(key)
+		while region is not None:
+			self.split(region)
+			region = self.region(key)
+		for i in [*marks(self.watched, key)]:
+			for region in [*self.sources.get(key[:i], ())]:
+				self.settle(region + key[i:])
+	
+	def expand(self, path: Tuple[str]):
+		"""
+		This method expands a literal saved as an int, a str
+		or a memoryview. Only one step is made:
+		- a positive number n becomes `base.nat.pos`, with n-1 as
+		prev, and zero becomes `base.nat.zero`.
+		- a string becomes `base.string`, with the memoryview of
+		the numbers of its characters as characters.
+		- a non empty memoryview becomes `base.list.element`, with
+		its first number as value and the rest of the memoryview
+		as next, and an empty one becomes `base.list.end`.
+		The proprieties are not overwritten if they already exist.
+		
+		>>> m = Mesh({('n',): 2, ('z',): 0})
+		>>> m.expand(('n',))
+		>>> m[('n',)], m[('n', 'prev')]
+		(('base', 'nat', 'pos'), 1)
+		>>> m.expand(('z',))
+		>>> m[('z',)]
+		('base', 'nat', 'zero')
+		
+		>>> m = Mesh({('s',): 'hi'})
+		>>> m.expand(('s',))
+		>>> m[('s',)], m[('s', 'characters')].tolist()
+		(('base', 'string'), [104, 105])
+		>>> m.expand(('s', 'characters'))
+		>>> m[('s', 'characters')], m[('s', 'characters', 'value')]
+		(('base', 'list', 'element'), 104)
+		>>> m[('s', 'characters', 'next')].tolist()
+		[105]
+		"""
+		value = self[path]
+		self[path] = structure(value)
+		if isinstance(value, str):
+			self.setdefault(path+('characters',),
+				memoryview(array('q', map(ord, value))))
+		elif isinstance(value, memoryview) and value:
+			self.setdefault(path+('value',), value[0])
+			self.setdefault(path+('next',), value[1:])
+		elif isinstance(value, int) and value:
+			self.setdefault(path+('prev',), value-1)
 		
 	def clone(self, oldroot: Tuple[str], newroot: Tuple[str], done=()):
 		"""
@@ -253,32 +1719,199 @@ class Mesh(dict):
 		>>> m.valueof(('a', 'self'))
 		('success',)
 		"""
+		self.run(self.cloning(oldroot, newroot, done))
+	
+	def run(self, task: Generator):
+		"""
+		This method runs a task, a generator that yields the
+		paths it needs the value of, together with the clones
+		already done, and is sent back their values. What the
+		task returns is returned.
+		Tasks are how Mesh.valueof and Mesh.clone, that need
+		each other, are run without calling each other: valueof
+		keeps the tasks waiting for a value on its own stack,
+		so how deep the evaluation goes is limited only by
+		memory, and not by the recursion limit.
+		
+		>>> m = Mesh({('a',): None, ('b',): ('a',)})
+		>>> def task():
+		...   return (yield ('b',), ())
+		>>> m.run(task())
+		('a',)
+		"""
+		try:
+			request = next(task)
+			while True:
+				request = task.send(self.valueof(*request))
+		except StopIteration as stop:
+			if isinstance(stop.value, Forward):
+				return self.valueof(*stop.value)
+			return stop.value
+	
+	def calling(self, oldroot: Tuple[str], newroot: Tuple[str],
+				path: Tuple[str], done) -> Generator:
+		"""
+		This task clones oldroot to newroot, and then returns
+		the value of path, that's what Mesh.valueof does when
+		path is a propriety of newroot that's not there yet.
+		The value is not waited for, see Forward.
+		If oldroot is an operator, Mesh.scheduler is given the
+		call first, to evaluate its operands in parallel.
+		If the value of the call is wanted, and oldroot is one
+		of the definitions, Mesh.machine is asked for it first,
+		unless Mesh.scheduler wants the call to be cloned, and
+		nothing is cloned if it finds it. Otherwise, if the
+		call to a definition is the value of another call to it,
+		it's moved next to that one, see Mesh.tail.
+		"""
+		if self.scheduler and oldroot[-1] in self.operators:
+			self.scheduler.operands(newroot)
+		if (self.machine and path[:len(newroot)+1] == newroot + ('self',)
+			and self.region(oldroot, strict=False) is None and
+			not (self.scheduler and self.scheduler.splits(oldroot, newroot))):
+			value = yield from self.machine.call(self, oldroot, newroot, done)
+			if value is not None:
+				self[newroot+('self',)] = value
+				if self.profile:
+					self.profile.ran(self, oldroot)
+				return Forward(path, done)
+		if (path[:len(newroot)+1] == newroot + ('self',) and
+			oldroot != ('same',) and self.get(oldroot, oldroot) is None):
+			moved = self.tail(oldroot, newroot)
+			if moved is not None:
+				return Forward(moved + path[len(newroot):], done)
+		yield from self.cloning(oldroot, newroot, done)
+		return Forward(path, done)
+	
+	def tail(self, function: Tuple[str],
+			 call: Tuple[str]) -> Optional[Tuple[str]]:
+		"""
+		This method checks if the value of a call to function is
+		the value of another call to function that it's inside,
+		as a function that calls itself as the last thing it does
+		would be cloned one call deeper every time, and the paths
+		would get longer and longer. Instead, a new call is made
+		next to the outermost of them, the caller, with the same
+		arguments, and the value of call is the value of the new
+		call, whose path is returned. If there's no such caller,
+		nothing is done, and None is returned.
+		The arguments of the new call are what Mesh.known finds
+		for the ones of call, and the caller, together with the
+		first call the caller was moved from, if it was, now lead
+		to the new call directly: as Mesh.valueof doesn't keep
+		the calls on its stack either, see Forward, what was
+		in the caller is not used anymore, and Mesh.collect
+		removes it. This way, a loop that passes on numbers
+		and the rest of a list, like `len_`, uses the same
+		memory at every step. An argument that can't be found
+		without evaluating it still leads to the caller,
+		that's then kept, as its value could need it.
+
+		>>> m = Mesh({
+		...   ('f',): None, ('f', 'n'): None,
+		...   ('f', 'self'): ('f', 'self', '1.', 'self'),
+		...   ('f', 'self', '1.'): ('f',),
+		...   ('f', 'self', '1.', 'n'): ('f', 'n', 'prev'),
+		...   ('c', '2.'): ('f',), ('c', '2.', 'n'): 3,
+		... })
+		>>> m.clone(('f',), ('c', '2.'))
+		>>> m.tail(('f',), ('c', '2.', 'self', '1.'))
+		('c', '0..')
+		>>> m[('c', '0..')], m[('c', '0..', 'n')]
+		(('f',), 2)
+		>>> m[('c', '2.', 'self')], ('c', '2.', 'self', '1.') in m
+		(('c', '0..', 'self'), False)
+		>>> m.clone(('f',), ('c', '0..'))
+		>>> m.tail(('f',), ('c', '0..', 'self', '1.'))
+		('c', '1..')
+		>>> m[('c', '1..', 'n')], m[('c', '2.', 'self')], ('c', '0..') in m
+		(1, ('c', '1..', 'self'), False)
+		>>> m.tail(('f',), ('c', '2.'))
+		"""
+		target = call + ('self',)
+		for i in range(1, len(call)):
+			caller, path = call[:i], call[:i] + ('self',)
+			if not caller[-1].endswith('.') or self.get(caller) != function:
+				continue
+			while path != target:
+				path = self.get(path)
+				if not isinstance(path, tuple) or path[:i] != caller:
+					break
+			else:
+				break
+		else:
+			return None
+		moved = caller[:-1] + (f'{next(self.moved)}..',)
+		while moved in self or self.names(moved):
+			moved = caller[:-1] + (f'{next(self.moved)}..',)
+		self[moved] = function
+		arguments = []
+		for name in sorted(self.names(call)):
+			if name != 'self' and not name.endswith('.'):
+				arguments.append(self.known(call + (name,)))
+				self[moved+(name,)] = arguments[-1]
+		self[target] = moved + ('self',)
+		# Mesh.recall has just remembered the call, and the same
+		# signature must now lead to the new call, that has the value
+		if self.calls:
+			signature = next(reversed(self.calls))
+			if self.calls[signature] == call:
+				self.calls[signature] = moved
+		# The caller is done: if nothing else can need it, what's in
+		# its value is removed, or all of it if it was moved itself,
+		# and what led to it leads to the new call instead
+		body, first = caller + ('self',), self.tails.pop(caller, caller)
+		frame = body if first == caller else caller
+		names = [*self.names(body)]
+		if (all(name.endswith('.') for name in names) and
+			not marked(self.watched, frame) and
+			not any(isinstance(value, tuple) and value[:len(frame)] == frame
+					for value in arguments) and
+			(first == caller or (self.get(first + ('self',)) == body and
+								 not self.names(first + ('self',))))):
+			self.discard([body + (name,) for name in names]
+						 if first == caller else [caller])
+			self[first + ('self',)] = moved + ('self',)
+			self.tails[moved] = first
+		return moved
+	
+	def cloning(self, oldroot: Tuple[str], newroot: Tuple[str],
+				done) -> Generator:
+		"The task of Mesh.clone, see Mesh.run."
 		delta = {}
-		selfpath = oldroot + ('self',)
 		if not oldroot in self:
-			self.valueof(oldroot, done)
-		blockeds = set()
-		for key, value in sorted(self.items(), key=lambda x: x[0]):
-			newkey = chroot(key, oldroot, newroot)
-			if any(key[:len(b)] == b for b in blockeds):
-				continue
-			if newkey == key:
-				continue
-			if not (newkey in self and self[newkey] is not None):
-				newval = (chroot(value, oldroot, newroot) 
-						  if not value is None else None)
-				delta[newkey] = newval
+			function = yield from self.operator(oldroot, done)
+			if function is None:
+				yield oldroot, done
 			else:
-				blockeds.add(key)
-		if oldroot in self and self[oldroot]:
+				oldroot = function
+		selfpath = oldroot + ('self',)
+		source, mapping = self.resolve(oldroot)
+		mapping += ((oldroot, newroot),)
+		if oldroot == newroot:
+			pass
+		elif not related(source, newroot) and not self.shown(newroot):
+			if self.names(source):
+				self.overlay(source, newroot, mapping)
+		else:
+			overlays = []
+			self.copy_subtree(source, newroot, mapping, delta, overlays)
+			for overlay in overlays:
+				self.overlay(*overlay)
+		if oldroot in self and self[oldroot] is not None:
 			delta[newroot] = self[oldroot]
 		if oldroot == ('same',):
+			first = yield newroot + ('first',), done
+			second = yield newroot + ('second',), done
 			delta[newroot+('self',)] = newroot + (('then',) 
-				if self.valueof(newroot+('first',), done) == self.valueof(newroot+('second',), done)
-				else ('else',))
+				if first == second else ('else',))
+		if source in self.intrinsics:
+			yield from self.intrinsic(source, newroot, delta, done)
 		if selfpath in self and self[selfpath] == oldroot:
 			delta[newroot+('self',)] = newroot
 		self.update(delta)
+		if self.profile:
+			self.profile.clone(self, oldroot, newroot, len(delta))
 		
 		
 def chroot(path: Tuple[str], oldroot: Tuple[str], newroot: Tuple[str]) -> Tuple[str]:
@@ -301,3 +1934,168 @@ def chroot(path: Tuple[str], oldroot: Tuple[str], newroot: Tuple[str]) -> Tuple[
 	if path[:len(oldroot)] == oldroot and path != oldroot:
 		return newroot + path[len(oldroot):]
 	return path
+
+def mark(trie: dict, path: Tuple[str]):
+	"""
+	This function adds a path to a trie, made of dictionaries
+	with a dictionary for each name, where None marks the end
+	of a path.
+	
+	>>> trie = {}
+	>>> mark(trie, ('a', 'b'))
+	>>> trie
+	{'a': {'b': {None: True}}}
+	"""
+	for name in path:
+		trie = trie.setdefault(name, {})
+	trie[None] = True
+
+def unmark(trie: dict, path: Tuple[str]):
+	"""
+	This function removes a path from a trie made by mark,
+	with the dictionaries that are left empty.
+	
+	>>> trie = {}
+	>>> mark(trie, ('a', 'b')); mark(trie, ('a',))
+	>>> unmark(trie, ('a', 'b')); trie
+	{'a': {None: True}}
+	>>> unmark(trie, ('a',)); trie
+	{}
+	"""
+	nodes = [trie]
+	for name in path:
+		nodes.append(nodes[-1][name])
+	del nodes[-1][None]
+	for i in reversed(range(len(path))):
+		if nodes[i+1]:
+			break
+		del nodes[i][path[i]]
+
+def marks(trie: dict, path: Tuple[str], strict: bool = True) -> Iterator[int]:
+	"""
+	This generator yields the lengths of the paths in a trie
+	made by mark that path starts with, from the shortest. If
+	strict is false, path itself can be one of them.
+	
+	>>> trie = {}
+	>>> mark(trie, ('a',)); mark(trie, ('a', 'b', 'c'))
+	>>> [*marks(trie, ('a', 'b', 'c'))], [*marks(trie, ('a', 'b', 'c'), False)]
+	([1], [1, 3])
+	"""
+	end = len(path)
+	for i in range(end + (not strict)):
+		if None in trie:
+			yield i
+		if i == end or not path[i] in trie:
+			return
+		trie = trie[path[i]]
+
+def marked(trie: dict, path: Tuple[str]) -> bool:
+	"""
+	This function checks if one of the paths in a trie made by
+	mark starts with path.
+	
+	>>> trie = {}
+	>>> mark(trie, ('a', 'b'))
+	>>> marked(trie, ('a',)), marked(trie, ('a', 'b')), marked(trie, ('b',))
+	(True, True, False)
+	"""
+	for name in path:
+		if not name in trie:
+			return False
+		trie = trie[name]
+	return True
+
+def hidden(path: Tuple[str]) -> bool:
+	"""
+	This function checks if a path is inside a call, that is if
+	one of its names is hidden.
+	
+	>>> hidden(('a', '1.', 'b')), hidden(('a', 'b'))
+	(True, False)
+	"""
+	return any(name.endswith('.') for name in path)
+
+def inside(path: Tuple[str], roots: Set[Tuple[str]]) -> bool:
+	"""
+	This function checks if a path starts with one of the roots.
+	
+	>>> inside(('a', 'b'), {('a',)}), inside(('a',), {('a', 'b')})
+	(True, False)
+	"""
+	return any(path[:i] in roots for i in range(len(path) + 1)) if roots else False
+
+def related(a: Tuple[str], b: Tuple[str]) -> bool:
+	"""
+	This function checks if one of two paths starts with the other.
+	
+	>>> related(('a', 'b'), ('a',)), related(('a',), ('b',))
+	(True, False)
+	"""
+	return a[:len(b)] == b or b[:len(a)] == a
+
+def rebase(value, mapping: Mapping):
+	"""
+	This is an helper function for the overlays of Mesh, that
+	gives a value to chroot with each oldroot and newroot of
+	the mapping, in order, if it's a path.
+	
+	>>> rebase(('a', 'b'), ((('a',), ('x',)), (('x',), ('y', 'z'))))
+	('y', 'z', 'b')
+	>>> rebase(3, ((('a',), ('x',)),))
+	3
+	"""
+	if isinstance(value, tuple):
+		for oldroot, newroot in mapping:
+			value = chroot(value, oldroot, newroot)
+	return value
+
+def literal(value, name: str):
+	"""
+	This function returns the literal that a propriety of a
+	literal is, like Mesh.expand would make it, or None if
+	the propriety is not a literal.
+	
+	>>> literal(2, 'prev'), literal(0, 'prev')
+	(1, None)
+	>>> literal('hi', 'characters').tolist()
+	[104, 105]
+	>>> literal(memoryview(array('q', [1, 2])), 'next').tolist()
+	[2]
+	"""
+	if isinstance(value, int) and value and name == 'prev':
+		return value - 1
+	if isinstance(value, str) and name == 'characters':
+		return memoryview(array('q', map(ord, value)))
+	if isinstance(value, memoryview) and value and name == 'value':
+		return value[0]
+	if isinstance(value, memoryview) and value and name == 'next':
+		return value[1:]
+	return None
+
+def structure(value) -> Tuple[str]:
+	"""
+	This function returns the structure of std that a literal
+	is, the value that Mesh.expand gives to it.
+	
+	>>> structure(3), structure(0), structure('hi')
+	(('base', 'nat', 'pos'), ('base', 'nat', 'zero'), ('base', 'string'))
+	>>> structure(memoryview(array('q', [1]))), structure(memoryview(array('q')))
+	(('base', 'list', 'element'), ('base', 'list', 'end'))
+	"""
+	if isinstance(value, str):
+		return ('base', 'string')
+	if isinstance(value, memoryview):
+		return ('base', 'list', 'element' if value else 'end')
+	return ('base', 'nat', 'pos' if value else 'zero')
+
+def concat(a: memoryview, b: memoryview) -> memoryview:
+	"""
+	This function joins two packed lists of numbers.
+	
+	>>> concat(memoryview(array('q', [1])), memoryview(array('q', [2, 3]))).tolist()
+	[1, 2, 3]
+	"""
+	items = array('q', a)
+	items.extend(b)
+	return memoryview(items)
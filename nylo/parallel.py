@@ -0,0 +1,409 @@
+"""
+This module evaluates the calls of a program that don't depend on
+each other at the same time, each in its own process. The calls that
+are not inside any definition, like `fib(n: 20)` in `-> [fib(n: 20)
+fib(n: 21)]`, only depend on the values written in the program, so
+they can be evaluated by a copy of the mesh, and only their value is
+sent back and saved in the mesh, before it's written.
+The calls inside a definition, like the two calls `fib` makes to
+itself in `+ fib(n: n.prev) fib(n: n.prev.prev)`, are only known
+once the definition has been cloned: the operands of an operator are
+all needed, and don't depend on each other, so when the operator is
+called, the ones that are calls are evaluated in the same way, by
+the same processes, that are given what's called and the arguments,
+see Scheduler.operands.
+"""
+
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import count
+from typing import Dict, Optional, Set, Tuple
+from machine import primitives
+from mesh import Mesh, hidden
+
+# The mesh the processes evaluate the calls with, copied to each of
+# them when it's started, see Scheduler.pool
+shared: Optional[Mesh] = None
+# The names of the calls made by apply
+places = count()
+
+class Scheduler:
+	"""
+	The calls of a program that are worth evaluating in parallel. A
+	call is one of them if it's not inside a definition, as then its
+	arguments are always the same, if it's written as a call, so that
+	its value is used, and if its cost is at least Scheduler.threshold.
+	The cost of a call is how many keys the definition it calls has,
+	times one more than the numbers given to it, as nylo functions
+	go on for as many steps as the numbers they're given. A call that
+	needs the value of another one is only started once that one's
+	value is known, and the value is given to it.
+	Set as Mesh.scheduler, it also evaluates the operands of the
+	operators called while evaluating, see Scheduler.operands.
+
+	>>> import stdlib
+	>>> from writer import Writer
+	>>> m = stdlib.program('-> [fib(n: 9) + fib(n: 8) fib(n: fib(n: 6))]',
+	...                    ('base', 'x'))
+	>>> scheduler = Scheduler(m, ('base', 'x'), 2)
+	>>> scheduler.threshold = 1
+	>>> len(scheduler.calls), len(scheduler.waiting)
+	(4, 1)
+	>>> scheduler.run()
+	4
+	>>> Writer(m).write(('base', 'x', 'self'))
+	'[55 411]'
+	"""
+
+	# The lowest cost of a call evaluated in another process
+	threshold = 1 << 8
+
+	# Public:
+
+	def __init__(self, mesh: Mesh, root: Tuple[str], jobs: int):
+		"Finds the calls of the program at root."
+		self.mesh = mesh
+		self.jobs = jobs
+		# The sizes of the definitions, see Scheduler.cost
+		self.sizes: Dict[Tuple[str], int] = {}
+		# If each definition calls an operator on two calls,
+		# see Scheduler.splits
+		self.forks: Dict[Tuple[str], bool] = {}
+		# How many values found by other processes have been saved
+		self.saved = 0
+		# The processes, and the process that started them, as a
+		# copy of the scheduler in one of them needs its own
+		self.executor: Optional[ProcessPoolExecutor] = None
+		self.owner: Optional[int] = None
+		keys = [*mesh.subtree(root, lambda key: mesh[key] is None)]
+		used = {mesh[key] for key in keys if isinstance(mesh[key], tuple)}
+		self.calls = [key for key in keys if key + ('self',) in used
+					  and isinstance(mesh[key], tuple)
+					  and mesh.get(mesh[key], 0) is None]
+		# The calls each one needs the value of
+		self.waiting = {}
+		for call in self.calls:
+			needed = self.reach(call, root) & set(self.calls) - {call}
+			if needed:
+				self.waiting[call] = needed
+
+	def run(self) -> int:
+		"""
+		This method evaluates the calls that cost enough, in at
+		most Scheduler.jobs processes, and saves their values in
+		the mesh. It returns how many have been evaluated. The
+		calls whose value can't be saved as a value of the mesh,
+		or that raise an error, are left to be evaluated as usual,
+		and so are all those that are left if the processes can't
+		be used anymore, for example if one of them is killed.
+		"""
+		calls = [call for call in self.calls if self.cost(call) >= self.threshold]
+		if self.jobs < 2 or len(calls) < 2:
+			return 0
+		tasks = {call: (evaluate, call) for call in calls}
+		return self.save(self.spread(tasks, self.waiting))
+
+	def operands(self, call: Tuple[str]) -> int:
+		"""
+		This method is run by Mesh.calling before the operator
+		called at call is cloned: its operands that are calls
+		that cost enough and don't have a value yet are evaluated
+		in parallel, if there are at least two of them, and their
+		values are saved in the mesh. It returns how many have
+		been saved. The processes have a copy of the mesh made
+		before the calls existed, so they're given what's called
+		and the arguments, see Scheduler.arguments, and they make
+		the call again, see apply. They share the jobs left, so
+		that they can do the same with the operators they call.
+
+		>>> import stdlib
+		>>> from machine import Machine
+		>>> from writer import Writer
+		>>> m = stdlib.program('-> fib(n: 12)', ('base', 'x'))
+		>>> m.machine = Machine(m)
+		>>> m.scheduler = Scheduler(m, ('base', 'x'), 2)
+		>>> m.scheduler.threshold = 1 << 6
+		>>> Writer(m).write(('base', 'x', 'self')), m.scheduler.saved
+		('233', 2)
+		"""
+		if self.jobs < 2:
+			return 0
+		found = (self.call(call + ('args', 'value')),
+				 self.call(call + ('args', 'next', 'value')))
+		tasks = {}
+		for found in found:
+			if (found is None or found + ('self',) in self.mesh or
+				self.cost(found) < self.threshold):
+				continue
+			arguments = self.arguments(found)
+			if arguments is not None:
+				tasks[found] = (apply, self.mesh[found], arguments)
+		if len(tasks) < 2:
+			return 0
+		return self.save(self.spread(tasks, {}))
+
+	def splits(self, function: Tuple[str], call: Tuple[str]) -> bool:
+		"""
+		This method checks if a call to function should be cloned,
+		instead of being run by Mesh.machine, so that the operands
+		of the operators it calls can be evaluated in parallel:
+		if there are jobs left, if the call costs enough, and if
+		function calls an operator on two calls.
+		"""
+		if self.jobs < 2:
+			return False
+		if not function in self.forks:
+			self.forks[function] = any(
+				key[-1] == 'args' and
+				self.call(key + ('value',)) is not None and
+				self.call(key + ('next', 'value')) is not None
+				for key in self.mesh.subtree(function))
+		return (self.forks[function] and
+				self.cost(call, function) >= self.threshold)
+
+	def close(self):
+		"""
+		This method stops the processes of Scheduler.pool, if
+		they've been started by this process, as a process can't
+		end until the processes it started do. They're started
+		again if they're needed after this.
+		"""
+		if self.executor is not None and self.owner == os.getpid():
+			self.executor.shutdown()
+		self.executor = None
+
+	# Private:
+
+	def pool(self) -> Optional[ProcessPoolExecutor]:
+		"""
+		This method returns the processes the calls are evaluated
+		in, at most Scheduler.jobs, or None if processes can't be
+		forked. They're started the first time they're needed,
+		each with a copy of the mesh as it is then, and they're
+		used by all the calls after that.
+		"""
+		if self.executor is None or self.owner != os.getpid():
+			try:
+				context = multiprocessing.get_context('fork')
+			except ValueError:
+				return None
+			self.executor = ProcessPoolExecutor(self.jobs, context)
+			self.owner = os.getpid()
+		return self.executor
+
+	def spread(self, tasks: Dict[Tuple[str], tuple],
+			   waiting: Dict[Tuple[str], Set[Tuple[str]]]) -> dict:
+		"""
+		This method evaluates the calls in Scheduler.pool, each
+		started once the calls it's waiting for are done, and
+		returns the values that have been found. Each call is
+		evaluated by its task, a function run in the process with
+		its arguments, the values of the calls found before and
+		an equal part of the jobs. If the processes stop working,
+		the calls left are not evaluated, and new processes are
+		started the next time.
+		"""
+		global shared
+		pool = self.pool()
+		if pool is None:
+			return {}
+		calls = [*tasks]
+		jobs = max(1, self.jobs // len(calls))
+		previous, shared, known, done = shared, self.mesh, {}, set()
+		try:
+			running = {}
+			while calls or running:
+				for call in [call for call in calls
+							 if not waiting.get(call, set()) - done]:
+					calls.remove(call)
+					task, *arguments = tasks[call]
+					try:
+						future = pool.submit(task, *arguments, dict(known), jobs)
+					except Exception:
+						calls.clear()
+						self.executor = None
+						break
+					running[future] = call
+				if not running:
+					break
+				finished, _ = wait(running, return_when=FIRST_COMPLETED)
+				for future in finished:
+					call = running.pop(future)
+					done.add(call)
+					try:
+						result = future.result()
+					except BrokenProcessPool:
+						self.executor = None
+						continue
+					except Exception:
+						continue
+					if result is not None:
+						known[call] = result
+		finally:
+			shared = previous
+		return known
+
+	def save(self, known: dict) -> int:
+		"""
+		This method saves the values found by Scheduler.spread
+		as the values of their calls, and returns how many have
+		been saved.
+		"""
+		saved = 0
+		for call, value in known.items():
+			# Paths are only the same if the definition is here too
+			if isinstance(value, tuple) and not (
+					value in self.mesh and self.mesh[value] is None):
+				continue
+			self.mesh[call + ('self',)] = unpack(value)
+			saved += 1
+		self.saved += saved
+		return saved
+
+	def call(self, path: Tuple[str]) -> Optional[Tuple[str]]:
+		"""
+		This method returns the call whose value is the value of
+		path, if it's a call to a definition, or None.
+		"""
+		value = self.mesh.get(path)
+		if not isinstance(value, tuple) or value[-1:] != ('self',):
+			return None
+		call = value[:-1]
+		if (call in self.mesh and isinstance(self.mesh[call], tuple) and
+			self.mesh.get(self.mesh[call], 0) is None):
+			return call
+		return None
+
+	def arguments(self, call: Tuple[str]) -> Optional[dict]:
+		"""
+		This method returns the arguments of call, by their names,
+		as Mesh.known finds them, if they're all numbers or
+		definitions that are not inside a call, that are the same
+		in the copies of the mesh of Scheduler.pool, or None.
+		"""
+		if hidden(self.mesh[call]):
+			return None
+		arguments = {}
+		for name in self.mesh.names(call):
+			argument = self.mesh.known(call + (name,))
+			if self.mesh.names(call + (name,)) or isinstance(argument, tuple) and (
+					hidden(argument) or self.mesh.get(argument, 0) is not None):
+				return None
+			arguments[name] = argument
+		return arguments
+
+	def cost(self, call: Tuple[str],
+			 function: Optional[Tuple[str]] = None) -> int:
+		"""
+		This method returns how much evaluating a call to function,
+		the value of call if it's not given, is expected to cost,
+		see Scheduler.
+		"""
+		if function is None:
+			function = self.mesh[call]
+		if not function in self.sizes:
+			self.sizes[function] = sum(1 for _ in self.mesh.subtree(function))
+		# Mesh.known also finds `prev` and `succ` of the numbers
+		numbers = (self.mesh.known(call + (name,))
+				   for name in self.mesh.names(call))
+		return self.sizes[function] * (1 + sum(n for n in numbers
+											   if isinstance(n, int)))
+
+	def reach(self, call: Tuple[str], root: Tuple[str]) -> Set[Tuple[str]]:
+		"""
+		This method returns the keys of the program that the
+		value of call can depend on: the arguments of the call,
+		and what their values are, one after the other.
+		"""
+		reached, todo = {call}, [call]
+		while todo:
+			for key in (todo[-1], *self.mesh.subtree(todo.pop())):
+				value = self.mesh.get(key)
+				if not isinstance(value, tuple) or value[:len(root)] != root:
+					continue
+				while not value in self.mesh:
+					value = value[:-1]
+				if not value in reached:
+					reached.add(value)
+					todo.append(value)
+		return reached
+
+
+def evaluate(call: Tuple[str], known: dict, jobs: int):
+	"""
+	This function is run by the processes of Scheduler.run: it
+	saves the values of the calls that are known, and returns
+	the value of call, if it's a literal or a definition, that
+	are the same in the mesh of the scheduler. If it raises
+	any error, None is returned, and the call is evaluated again
+	by the scheduler's mesh, that raises it if it has to.
+	The scheduler of the mesh, if it has one, can use jobs
+	processes to evaluate the call, that are stopped after it.
+	"""
+	if shared.scheduler:
+		shared.scheduler.jobs = jobs
+	for other, value in known.items():
+		shared[other + ('self',)] = unpack(value)
+	try:
+		path = shared.valueof(call + ('self',))
+	except Exception:
+		return None
+	finally:
+		if shared.scheduler:
+			shared.scheduler.close()
+	number = shared.number(call + ('self',))
+	if number is not None:
+		return number
+	packed = shared.packed(call + ('self',))
+	if packed is not None:
+		return packed.tobytes()
+	return value(shared, call + ('self',), path)
+
+def apply(function: Tuple[str], arguments: dict, known: dict, jobs: int):
+	"""
+	This function is run by the processes of Scheduler.operands:
+	it makes a call to function with the given arguments, in a
+	place of its own, as the call of the scheduler's mesh is not
+	in the copy of the process, and returns its value, see evaluate.
+	"""
+	call = ('parallel', f'{next(places)}.')
+	shared[call] = function
+	for name, argument in arguments.items():
+		shared[call + (name,)] = argument
+	return evaluate(call, known, jobs)
+
+def value(mesh: Mesh, path: Tuple[str], found: Tuple[str]):
+	"""
+	This function returns the string that path is, or found, the
+	value of path, if it's a definition that's not a literal, or
+	None.
+
+	>>> m = Mesh({('a',): ('b',), ('b',): 'hi', ('c',): None})
+	>>> value(m, ('a',), ('base', 'string')), value(m, ('c',), ('c',))
+	('hi', ('c',))
+	"""
+	for _ in range(64):
+		if isinstance(mesh.get(path), str):
+			return mesh[path]
+		if not isinstance(mesh.get(path), tuple):
+			break
+		path = mesh[path]
+	if found in mesh and mesh[found] is None and not found[:2] in primitives:
+		return found
+	return None
+
+def unpack(value):
+	"""
+	This function returns a value sent by evaluate as it's saved
+	in the mesh: lists of numbers are sent as their bytes, as
+	memoryviews can't be sent to another process.
+
+	>>> unpack(memoryview(array('q', [1, 2])).tobytes()).tolist(), unpack(3)
+	([1, 2], 3)
+	"""
+	if isinstance(value, bytes):
+		return memoryview(value).cast('q')
+	return value
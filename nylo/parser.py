@@ -3,9 +3,12 @@ This class brings together all the function used to parse nylo
 code using the Code class.
 """
 
+from array import array
 from code import Code
-from string import ascii_letters, digits, punctuation
+from itertools import count
+from lexer import IDENT, BACKTICK_IDENT, NAT, STRING, OP, ARROW
 from mesh import Mesh
+from sys import intern
 from typing import Tuple, Dict, Union
 
 Path = Tuple[str]
@@ -13,8 +16,6 @@ Call = Union[None, Path]
 
 me: Path = ('self',)
 
-operators = set(punctuation) - set('[](),\'\".\\')
-
 class Parser:
 	"""
 	Here are all the parsers. The parser are called with a Code
@@ -24,17 +25,24 @@ class Parser:
 	Parsing the value x with the path y means mesh[y] = x.
 	Possible values are either no value (None), or a tuple with
 	the context the variable is used, and the variable itself.
+	All the names in the paths are interned, so that the same
+	name is always the same string, and equal names are found
+	equal without comparing their characters. Paths are still
+	tuples of names, so checking if a path starts with another
+	one still compares them one name at a time.
 	"""
 	
 	def __init__(self, code: Code):
 		"Creates a new instance of the parser."
 		self.code = code
 		self.mesh = Mesh({})
+		# Numbers used for the names of the hidden places
+		self.hidden = count()
 		
 	def parse(self, path: Path, call: Call = None):
 		"""
 		This parses any value. This checks to what value the first
-		character does corrispond and call the right parser.
+		token does corrispond and call the right parser.
 		The call flag specifies if we're parsing a structure or a
 		call. This is because calls behave differently: the variable
 		inside are based on the context outside the call, and the
@@ -68,16 +76,16 @@ class Parser:
 		>>> p = Parser(Code(c))
 		>>> p.parse(('root',), None)
 		>>> p.mesh[('root',)]
-		(('root',), ('base', 'nat', 'zero'))
+		0
 		
 		>>> c = 'fib(n: n)'
 		>>> p = Parser(Code(c))
 		>>> p.parse(('x',))
-		>>> p.mesh[('x', 'x.',)]
+		>>> p.mesh[('x', '0.',)]
 		(('x',), ('fib',))
 		>>> p.mesh[('x',)]
-		(('x', 'x.'), ('x.', 'self'))
-		>>> p.mesh[('x', 'x.', 'n')]
+		(('x', '0.'), ('0.', 'self'))
+		>>> p.mesh[('x', '0.', 'n')]
 		(('x',), ('n',))
 		
 		>>> c = '[1, 2]'
@@ -94,17 +102,17 @@ class Parser:
 		
 		>>> p = Parser(Code('+ 0 0'))
 		>>> p.parse(('hello',))
-		>>> p.mesh[('hello', 'hello.')]
-		(('hello',), ('hello.', 'args', 'value', '+'))
-		>>> p.mesh[('hello', 'hello.', 'args')]
+		>>> p.mesh[('hello', '0.')]
+		(('hello',), ('0.', 'args', 'value', '+'))
+		>>> p.mesh[('hello', '0.', 'args')]
 		(('hello',), ('base', 'list', 'element'))
-		>>> p.mesh[('hello', 'hello.', 'args', 'value')]
-		(('hello', 'hello.', 'args', 'value'), ('base', 'nat', 'zero'))
+		>>> p.mesh[('hello', '0.', 'args', 'value')]
+		0
 		
 		>>> p = Parser(Code('=} 0 0'))
 		>>> p.parse(('hello',))
-		>>> p.mesh[('hello','hello.')]
-		(('hello',), ('hello.', 'args', 'value', '=}'))
+		>>> p.mesh[('hello','0.')]
+		(('hello',), ('0.', 'args', 'value', '=}'))
 		
 		>>> p = Parser(Code('-> 0 0'))
 		>>> p.parse(('hello',))
@@ -117,36 +125,36 @@ class Parser:
 		>>> p.mesh[('hello',)]
 		(('hello',), ('{',))
 		"""
-		hide = ('.'.join(path)+'.',)
 		if not path:
 			raise ValueError('parse first argument cannot be ().')
-		# Strings
-		if self.code.is_in('\'"'):
-			self.pstring(path)
-		# Lists
-		elif self.code.is_in('['):
-			self.plist(path, call)
-		# Natural
-		elif self.code.is_in(digits):
-			self.nat(path)
-		# Variable
-		elif self.code.is_in(ascii_letters + '_`'):
-			self.mesh[path] = (call or path, self.var())
-			# Call
-			if self.code.is_in('('):
-				self.mesh[path+hide] = self.mesh[path]
-				self.structure(path+hide, call or path)
-		# Symbol
-		elif (self.code.is_in(operators) and 
-			not ''.join(self.code.code).startswith('->')):
-			self.op(path, hide, call)
-		# Structure
-		elif self.code.is_in('('):
-			self.structure(path, call)
-		else:
-			self.code.skip('any object')
+		self.run(self.value, path, call)
+		
+	def run(self, step, *args):
+		"""
+		This method runs the parser. Instead of calling each other
+		recursively, the parsers are split into steps, that push
+		the steps that have to be run next on a stack. The first
+		step is given as argument, and the parsing ends when the 
+		stack is empty. In this way, how deeply values are nested
+		and how long lists and chains of operators are is limited
+		only by memory, and not by the recursion limit.
+		Steps that have to be run in order are pushed in the
+		reverse order, as the last step pushed is run first.
+		
+		>>> p = Parser(Code('[' * 5000 + ']' * 5000))
+		>>> p.parse(('x',))
+		>>> p.mesh[('x',) + ('value',) * 4999][1]
+		('base', 'list', 'end')
+		>>> p = Parser(Code('+ ' * 1000 + '1 ' * 1001))
+		>>> p.parse(('x',))
+		>>> len(p.mesh)
+		6001
+		"""
+		self.stack = [(step, args)]
+		while self.stack:
+			step, args = self.stack.pop()
+			step(*args)
 			
-				
 	def var(self) -> Path:
 		"""
 		This method parses a variable. A variable is a tuple of string,
@@ -173,46 +181,42 @@ class Parser:
 		>>> Parser(Code('hi.`<`.`=`')).var()
 		('hi', '<', '=')
 		"""
-		if self.code.is_in('`'):
-			self.code.skip('`')
-			v = self.code.skip_while('`', reverse=True),
-			self.code.skip('`')
-		elif self.code.is_in(ascii_letters + '_'):
-			v = self.code.skip_while(ascii_letters + digits + '_'),
-		else:
-			return ()
-		if self.code.is_in('.'):
+		v = []
+		while True:
+			if self.code.is_in(BACKTICK_IDENT):
+				v.append(intern(self.code.skip(BACKTICK_IDENT)[1:-1]))
+			elif self.code.is_in(IDENT):
+				v.append(intern(self.code.skip(IDENT)))
+			else:
+				break
+			if not self.code.is_in('.'):
+				break
 			self.code.skip('.')
-			v += self.var()
-		return v
+		return tuple(v)
 	
 	def nat(self, path: Path):
 		"""
-		This method parses a natural. It will build the nat data structure
+		This method parses a natural. It represents the nat data structure
 		0 -> nat.zero
 		1 -> nat.pos(prev: nat.zero)
 		2 -> nat.pos(prev: nat.pos(prev: nat.zero))
+		But the number is just saved as an int, and the mesh will
+		build the structure only when it's needed.
 		
 		>>> p = Parser(Code('0'))
 		>>> p.nat(('x',))
 		>>> p.mesh[('x',)]
-		(('x',), ('base', 'nat', 'zero'))
-		>>> p = Parser(Code('1'))
+		0
+		>>> p = Parser(Code('4201337'))
 		>>> p.nat(('x',))
 		>>> p.mesh[('x',)]
-		(('x',), ('base', 'nat', 'pos'))
-		>>> p.mesh[('x', 'prev')]
-		(('x', 'prev'), ('base', 'nat', 'zero'))
+		4201337
 		>>> Parser(Code('hi!')).nat(('x',))
 		Traceback (most recent call last):
 			...
 		SystemExit
 		"""
-		n = int(self.code.skip_while(digits))
-		for i in range(n):
-			self.mesh[path] = (path, ('base', 'nat', 'pos'))
-			path += ('prev',)
-		self.mesh[path] = (path, ('base', 'nat', 'zero'))
+		self.mesh[path] = int(self.code.skip(NAT))
 		
 	def plist(self, path: Path, call=None):
 		"""
@@ -220,19 +224,28 @@ class Parser:
 		[] -> list.end
 		[1] -> list(value: 1, next: list.end)
 		[2] -> list(value: 1, next: list(value: 2, next: list.end))
+		If the list is made only of numbers, it's saved as a
+		packed buffer of ints, and the mesh will build the 
+		structure only when it's needed.
 		
 		>>> p = Parser(Code('[]'))
 		>>> p.plist(('x',))
 		>>> p.mesh[('x',)]
 		(('x',), ('base', 'list', 'end'))
-		>>> p = Parser(Code('[0]'))
+		>>> p = Parser(Code('[0, 5]'))
+		>>> p.plist(('x',))
+		>>> p.mesh[('x',)].tolist()
+		[0, 5]
+		>>> p = Parser(Code('[0 a]'))
 		>>> p.plist(('x',))
 		>>> p.mesh[('x',)]
 		(('x',), ('base', 'list', 'element'))
 		>>> p.mesh[('x', 'value')]
-		(('x', 'value'), ('base', 'nat', 'zero'))
-		>>> p.mesh[('x', 'next')]
-		(('x', 'next'), ('base', 'list', 'end'))
+		0
+		>>> p.mesh[('x', 'next', 'value')]
+		(('x', 'next', 'value'), ('a',))
+		>>> p.mesh[('x', 'next', 'next')]
+		(('x', 'next', 'next'), ('base', 'list', 'end'))
 		>>> Parser(Code('hi!')).plist(('x',))
 		Traceback (most recent call last):
 			...
@@ -240,40 +253,22 @@ class Parser:
 		>>> Parser(Code('[1, 2]')).plist(('x',))
 		>>> Parser(Code('[1 2]')).plist(('x',))
 		"""
-		self.code.skip('[')
-		while not self.code.is_in(']'):
-			self.parse(path+('value',), call)
-			if self.code.is_in(','):
-				self.code.skip(',')
-			self.mesh[path] = (path, ('base', 'list', 'element'))
-			path += ('next',)
-		self.mesh[path] = (path, ('base', 'list', 'end'))
-		self.code.skip(']')
+		self.run(self.list_start, path, call)
 
 	def pstring(self, path: Path):
 		"""
 		This method will parse a string, an instance of 
 		the string object with a list of characters's numbers
 		as character propriety.
+		The string is saved as it is, and the mesh will build
+		the structure only when it's needed.
 		
 		>>> p = Parser(Code('"ary"'))
 		>>> p.pstring(('x',))
 		>>> p.mesh[('x',)]
-		(('x',), ('base', 'string'))
-		>>> p.mesh[('x', 'characters')]
-		(('x', 'characters'), ('base', 'list', 'element'))
-		>>> p.mesh[('x', 'characters', 'value')]
-		(('x', 'characters', 'value'), ('base', 'nat', 'pos'))
+		'ary'
 		"""
-		start = (self.code.skip("'") if self.code.is_in("'") 
-		   else self.code.skip('"'))
-		s = self.code.skip_while(start, reverse=True)
-		self.code.skip(start)
-		self.mesh[path] = (path, ('base', 'string'))
-		s = [*f'[{",".join(map(str, map(ord, s)))}]']
-		self.code.code = s + self.code.code
-		self.parse(path+('characters',))
-		[self.code.consumed.pop() for i in range(len(s))]
+		self.mesh[path] = self.code.skip(STRING)[1:-1]
 		
 	def op(self, path: Path, hide: Path, call=None):
 		"""
@@ -282,15 +277,7 @@ class Parser:
 		to op.args.value, then will parse the operator, and
 		then the value after the operator.
 		"""
-		op = self.code.skip_while(operators),
-		self.mesh[path] = (path, path+hide+('self',))
-		self.mesh[path+hide+('args',)] = (path, ('base', 'list', 'element'))
-		self.mesh[path+hide+('args', 'next')] = (path, ('base', 'list', 'element'))
-		self.mesh[path+hide+
-			('args', 'next', 'next')] = (path, ('base', 'list', 'end'))
-		self.mesh[path+hide] = (path, hide+('args', 'value')+op)
-		self.parse(path+hide+('args', 'value'), call or path)
-		self.parse(path+hide+('args', 'next', 'value'), call or path)
+		self.run(self.op_start, path, hide, call)
 		
 	def structure(self, path: Path, call: Call):
 		"""
@@ -336,7 +323,10 @@ class Parser:
 								   )
 		In order to avoid different value clashing, all hide values
 		should have a different value. I therefore set the
-		hide variable to the path i'm hiding plus .
+		hide variable to a number that is different every
+		time plus ., so that it can't be a variable name.
+		The name does not grow with the path, so that keys
+		stay short even in deeply nested calls.
 								   
 		If the structure ends on ')' and it is a call:
 			When we have something like `fib(n: 10)` we want
@@ -424,31 +414,155 @@ class Parser:
 			...
 		SystemExit
 		"""
-		listpath = path
-		self.code.skip('(')
+		self.run(self.structure_start, path, call)
+		
+	# Steps
+	
+	def value(self, path: Path, call: Call):
+		"This step parses any value, see Parser.parse."
+		hide = (intern(f'{next(self.hidden)}.'),)
+		# Strings
+		if self.code.is_in(STRING):
+			self.pstring(path)
+		# Lists
+		elif self.code.is_in('['):
+			self.list_start(path, call)
+		# Natural
+		elif self.code.is_in(NAT):
+			self.nat(path)
+		# Variable
+		elif self.code.is_in(IDENT, BACKTICK_IDENT):
+			self.mesh[path] = (call or path, self.var())
+			# Call
+			if self.code.is_in('('):
+				self.mesh[path+hide] = self.mesh[path]
+				self.structure_start(path+hide, call or path)
+		# Symbol
+		elif self.code.is_in(OP):
+			self.op_start(path, hide, call)
+		# Structure
+		elif self.code.is_in('('):
+			self.structure_start(path, call)
+		else:
+			self.code.skip('any object')
 			
-		while not (self.code.is_in(')') or self.code.startswith('->')):
-			key: Path = self.var()
-			self.code.skip(':')
-			self.parse(path+key, call)
-			while self.code.is_in(','):
+	def list_start(self, path: Path, call: Call):
+		"""
+		This step starts parsing a list, see Parser.plist.
+		All the numbers at the beginning are read at once, and
+		if there's nothing else the list is packed.
+		"""
+		self.code.skip('[')
+		numbers = []
+		while self.code.is_in(NAT):
+			numbers.append(int(self.code.skip(NAT)))
+			if self.code.is_in(','):
 				self.code.skip(',')
-			
-		if self.code.startswith('->'):
-			[*map(self.code.skip, '->')]
+		if numbers and self.code.is_in(']') and max(numbers) < 1 << 63:
+			self.code.skip(']')
+			self.mesh[path] = memoryview(array('q', numbers))
+			return
+		for n in numbers:
+			self.mesh[path+('value',)] = n
+			self.mesh[path] = (path, ('base', 'list', 'element'))
+			path += ('next',)
+		self.list_items(path, call)
+		
+	def list_items(self, path: Path, call: Call):
+		"This step parses the next element of a list, or its end."
+		if self.code.is_in(']'):
+			self.mesh[path] = (path, ('base', 'list', 'end'))
+			self.code.skip(']')
+			return
+		self.stack.append((self.list_item_end, (path, call)))
+		self.stack.append((self.value, (path+('value',), call)))
+		
+	def list_item_end(self, path: Path, call: Call):
+		"This step is run after an element of a list has been parsed."
+		if self.code.is_in(','):
+			self.code.skip(',')
+		self.mesh[path] = (path, ('base', 'list', 'element'))
+		self.list_items(path+('next',), call)
+		
+	def op_start(self, path: Path, hide: Path, call: Call):
+		"This step parses an operator, see Parser.op."
+		op = intern(self.code.skip(OP)),
+		self.mesh[path] = (path, path+hide+('self',))
+		self.mesh[path+hide+('args',)] = (path, ('base', 'list', 'element'))
+		self.mesh[path+hide+('args', 'next')] = (path, ('base', 'list', 'element'))
+		self.mesh[path+hide+
+			('args', 'next', 'next')] = (path, ('base', 'list', 'end'))
+		self.mesh[path+hide] = (path, hide+('args', 'value')+op)
+		self.stack.append((self.value,
+			(path+hide+('args', 'next', 'value'), call or path)))
+		self.stack.append((self.value,
+			(path+hide+('args', 'value'), call or path)))
+		
+	def colon(self):
+		"""
+		This method parses the ':' after a key. The lexer reads
+		a ':' followed by an operator as part of it, as it can't
+		know if it's after a key, so it's split off here.
+		
+		>>> p = Parser(Code('(c:+ 2 1, d: 3)'))
+		>>> p.parse(('x',))
+		>>> p.mesh[('x', 'c', '1.')][1]
+		('1.', 'args', 'value', '+')
+		>>> p.mesh[('x', 'd')]
+		3
+
+		A name right after the ':' is not part of it.
+		>>> p = Parser(Code('(a:_b, c:`x`, _b: 1, `x`: 2)'))
+		>>> p.parse(('x',))
+		>>> p.mesh[('x', 'a')], p.mesh[('x', 'c')]
+		((('x', 'a'), ('_b',)), (('x', 'c'), ('x',)))
+		"""
+		if self.code.is_in(OP) and self.code.token.text[0] == ':':
+			self.code.split(1)
+		self.code.skip(':')
+		
+	def structure_start(self, path: Path, call: Call):
+		"This step starts parsing a structure, see Parser.structure."
+		self.code.skip('(')
+		self.structure_items(path, call)
+		
+	def structure_items(self, path: Path, call: Call):
+		"""
+		This step parses the next couple of key: value of a
+		structure, or what's after the '->' if there is one.
+		"""
+		if not self.code.is_in(')', ARROW):
+			key: Path = self.var()
+			self.colon()
+			self.stack.append((self.structure_item_end, (path, call)))
+			self.stack.append((self.value, (path+key, call)))
+			return
+		
+		if self.code.is_in(ARROW):
+			self.code.skip(ARROW)
 			if call:
 				self.mesh[path[:-1]] = (path, (path[-1],) + 
 					(() if self.code.is_in(')') else self.var()))
 			else:
-				self.parse(path + me, call)
+				self.stack.append((self.structure_end, (path, call)))
+				self.stack.append((self.value, (path + me, call)))
+				return
 		else:
 			if call:
 				self.mesh[path[:-1]] = (path, (path[-1],) + me)
 			else:
 				self.mesh[path + me] = (path, path)
-				
+		self.structure_end(path, call)
+		
+	def structure_item_end(self, path: Path, call: Call):
+		"This step is run after a value of a structure has been parsed."
+		while self.code.is_in(','):
+			self.code.skip(',')
+		self.structure_items(path, call)
+		
+	def structure_end(self, path: Path, call: Call):
+		"This step ends parsing a structure."
 		if not path in self.mesh:
 			self.mesh[path] = None
 			
 		self.code.skip(')')
-			
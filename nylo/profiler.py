@@ -0,0 +1,271 @@
+"""
+This module measures where the time goes when a program is run: how
+long each phase takes, like parsing and binding, and what the mesh
+does while it's evaluated, counted for each definition that's called,
+see Profile. It's only asked anything if it's the Mesh.profile of a
+mesh, so nothing is counted, and nothing is slower, otherwise.
+"""
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set, Tuple
+from mesh import Mesh, Task, literals, structure
+
+class Counters:
+	"""
+	What's been done for the calls to a definition: how many have
+	been cloned, how many keys have been copied to clone them, how
+	many values they have looked for, and how many have been run
+	by the machine instead, see machine.Machine.
+	"""
+	__slots__ = ('clones', 'copied', 'lookups', 'machine')
+
+	def __init__(self):
+		self.clones = 0
+		self.copied = 0
+		self.lookups = 0
+		self.machine = 0
+
+
+class Profile:
+	"""
+	The time taken by each phase of running a program, and the
+	counters of the mesh evaluating it: how many times valueof
+	has been called, how many tasks were waiting on its stack at
+	most, how many keys the mesh has had at most, and the Counters
+	of each definition whose calls have been evaluated. A call
+	whose value is another call, e.g. a call remembered by
+	Mesh.recall, is counted for the definition that one calls,
+	and so is a method of a value, see definition.
+
+	>>> import stdlib
+	>>> from writer import Writer
+	>>> profile = Profile()
+	>>> std = stdlib.load()
+	>>> m = stdlib.program('-> fib(n: 6)', ('base', 'x'), std, profile.phase)
+	>>> m.profile = profile
+	>>> Writer(m).write(('base', 'x', 'self'))
+	'13'
+	>>> [*profile.phases]
+	['parse', 'bind']
+	>>> fib = profile.definitions[('base', 'fib')]
+	>>> fib.clones > 0, fib.copied > 0, fib.lookups > 0, fib.machine
+	(True, True, True, 0)
+	>>> profile.valueofs, profile.depth > 0, profile.peak >= len(std)
+	(4, True, True)
+	>>> json.loads(profile.json())['definitions']['base.fib']['clones'] == fib.clones
+	True
+	"""
+
+	# Public:
+
+	# How many values definition follows at most
+	steps = 1 << 12
+
+	def __init__(self):
+		# The seconds taken by each phase, in the order they're run
+		self.phases: Dict[str, float] = {}
+		self.definitions: Dict[Tuple[str], Counters] = defaultdict(Counters)
+		# The definition each call has been cloned from
+		self.calls: Dict[Tuple[str], Tuple[str]] = {}
+		# The definitions that paths are bound to, see definition
+		self.bound: Dict[Tuple[str], Tuple[str]] = {}
+		self.valueofs = 0
+		self.depth = 0
+		self.peak = 0
+
+	@contextmanager
+	def phase(self, name: str):
+		"This context manager adds the time spent in it to the phase name."
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.phases[name] = (self.phases.get(name, 0) +
+								 time.perf_counter() - start)
+
+	def valueof(self):
+		"This method is called by Mesh.valueof every time it's called."
+		self.valueofs += 1
+
+	def lookup(self, mesh: Mesh, task: Task, depth: int):
+		"""
+		This method is called by Mesh.valueof every time the task
+		of a call looks for a value, and depth is how long the
+		stack of valueof is.
+		"""
+		called = self.calls.get(task.target) or self.definition(mesh, task.source)
+		self.definitions[called].lookups += 1
+		self.depth = max(self.depth, depth)
+		self.peak = max(self.peak, len(mesh))
+
+	def clone(self, mesh: Mesh, source: Tuple[str], call: Tuple[str],
+			  copied: int):
+		"""
+		This method is called by Mesh.clone every time source is
+		cloned to call, and copied is how many keys it wrote.
+		"""
+		self.calls[call] = self.definition(mesh, source)
+		counters = self.definitions[self.calls[call]]
+		counters.clones += 1
+		counters.copied += copied
+		self.peak = max(self.peak, len(mesh))
+
+	def ran(self, mesh: Mesh, function: Tuple[str]):
+		"This method is called when the machine finds the value of a call."
+		self.definitions[self.definition(mesh, function)].machine += 1
+
+	def table(self) -> str:
+		"""
+		This method returns the profile as a table for humans, the
+		definitions that have been cloned the most first.
+
+		>>> profile = Profile()
+		>>> profile.phases['bind'] = 0.25
+		>>> profile.definitions[('base', 'fib')].clones = 3
+		>>> print(profile.table())
+		phase      seconds
+		bind         0.250
+		<BLANKLINE>
+		valueof calls  0
+		max depth      0
+		peak keys      0
+		<BLANKLINE>
+		definition  clones  copied  per clone  lookups  machine
+		base.fib         3       0        0.0        0        0
+		"""
+		lines = [f'{"phase":<8} {"seconds":>9}']
+		lines.extend(f'{name:<8} {seconds:9.3f}'
+					 for name, seconds in self.phases.items())
+		lines.append('')
+		lines.append(f'{"valueof calls":<14} {self.valueofs}')
+		lines.append(f'{"max depth":<14} {self.depth}')
+		lines.append(f'{"peak keys":<14} {self.peak}')
+		if not self.definitions:
+			return '\n'.join(lines)
+		rows = [('.'.join(name), counters) for name, counters in sorted(
+			self.definitions.items(),
+			key=lambda item: (-item[1].clones, -item[1].lookups, item[0]))]
+		width = max(len('definition'), *(len(name) for name, _ in rows))
+		lines.append('')
+		lines.append(f'{"definition":<{width}}  clones  copied  per clone'
+					 '  lookups  machine')
+		for name, counters in rows:
+			average = counters.copied / counters.clones if counters.clones else 0
+			lines.append(f'{name:<{width}} {counters.clones:7} '
+						 f'{counters.copied:7} {average:10.1f} '
+						 f'{counters.lookups:8} {counters.machine:8}')
+		return '\n'.join(lines)
+
+	def json(self) -> str:
+		"This method returns the profile as a JSON object."
+		return json.dumps({
+			'phases': self.phases,
+			'valueof': self.valueofs,
+			'depth': self.depth,
+			'peak': self.peak,
+			'definitions': {'.'.join(name): {
+				slot: getattr(counters, slot) for slot in Counters.__slots__
+			} for name, counters in self.definitions.items()},
+		})
+
+	# Private:
+
+	def definition(self, mesh: Mesh, source: Tuple[str]) -> Tuple[str]:
+		"""
+		This method returns the definition source is bound to, see
+		definition, and if it's been copied by a clone, the one it
+		was copied from.
+		"""
+		found = definition(mesh, source, self.bound)
+		for i in reversed(range(1, len(found))):
+			if found[:i] in self.calls:
+				copied = self.calls[found[:i]] + found[i:]
+				return copied if copied in mesh else found
+		return found
+
+
+def definition(mesh: Mesh, source: Tuple[str],
+			   bound: Optional[Dict[Tuple[str], Tuple[str]]] = None) -> Tuple[str]:
+	"""
+	This function returns the definition a call cloned from source
+	calls, that is the key it's bound to: source, if it's a key
+	whose value is not another path, or what it's a call to,
+	following the values of the paths, and of what source is a
+	propriety of, until a key that's not a call is found. A literal
+	is its structure, see mesh.structure, so a method of a value is
+	the method of its structure, like `+` of 3 is base.nat.pos.+.
+	A call whose value is not there yet calls what the call it's in
+	does, and something that's not defined is the longest key
+	source starts with. The definitions found are saved in bound,
+	if it's given, and so are the ones of what source is a
+	propriety of, that are found first, but the ones found through
+	a call that's not there yet, as they change once it's cloned.
+	After Profile.steps values, source is given up on, and so is
+	a definition that doesn't end, like one that's a propriety of
+	itself.
+
+	>>> m = Mesh({('f',): None, ('c',): ('f',), ('d',): ('c',),
+	...           ('d', 'n'): 3, ('base', 'nat', 'pos'): None,
+	...           ('base', 'nat', 'pos', '+'): None,
+	...           ('e',): ('e', '1.', 'self'), ('e', '1.'): ('d',)})
+	>>> definition(m, ('f',)), definition(m, ('d',)), definition(m, ('e',))
+	(('f',), ('f',), ('f',))
+	>>> definition(m, ('d', 'n', '+')), definition(m, ('d', 'm'))
+	(('base', 'nat', 'pos', '+'), ('f',))
+	>>> bound = {}
+	>>> definition(m, ('d', 'n', '+'), bound)
+	('base', 'nat', 'pos', '+')
+	>>> bound[('d', 'n')]
+	('base', 'nat', 'pos')
+	>>> definition(Mesh({('a',): ('a', 'b')}), ('a', 'c'))
+	('a', 'c')
+	"""
+	bound = {} if bound is None else bound
+	# The paths that wait for the definition of what they're a
+	# propriety of: the paths already followed, the names after
+	# it, and if what's found for them can be saved
+	waiting: List[Tuple[List[Tuple[str]], Tuple[str], bool]] = []
+	seen: List[Tuple[str]] = []
+	keys = True
+	# What the paths that are waiting are a propriety of
+	resolving: Set[Tuple[str]] = set()
+	for _ in range(Profile.steps):
+		if source in bound or source in seen:
+			found = bound.get(source, source)
+		else:
+			seen.append(source)
+			i = len(source)
+			while i and not source[:i] in mesh:
+				i -= 1
+			value = mesh.get(source[:i]) if i else None
+			if isinstance(value, literals):
+				value = structure(value)
+			if not isinstance(value, tuple):
+				found = source[:i] or source[-1:]
+				keys = keys and i == len(source)
+			elif i == len(source):
+				source = value
+				continue
+			elif source[i-1].endswith('.'):
+				source, keys = value, False
+				continue
+			elif source[:i] in bound:
+				source = bound[source[:i]] + source[i:]
+				continue
+			elif source[:i] in resolving:
+				break
+			else:
+				waiting.append((seen, source[i:], keys))
+				source, seen, keys = source[:i], [], True
+				resolving.add(source)
+				continue
+		if keys:
+			bound.update((path, found) for path in seen)
+		if not waiting:
+			return found
+		seen, names, outer = waiting.pop()
+		source, keys = found + names, keys and outer
+	return (waiting[0][0] if waiting else seen)[0]
@@ -0,0 +1,322 @@
+"""
+This module saves an evaluated mesh to a snapshot file, that can be
+opened again to look up the values of its paths, without parsing,
+binding and evaluating the program again, and without reading the
+whole file: it's mapped in memory with mmap, and each lookup only
+reads the few records it needs.
+
+A snapshot file is made of, in order:
+- a header, with the magic number, the version of the format and
+how many strings, path names, records and numbers there are.
+- the offsets of the strings in the string table, one more than
+the strings, so that each string ends where the next one starts.
+- the records, one for each key, sorted by key, each with where
+the key is in the path names, how many names it has, the kind of
+its value and the value itself, see Snapshot.
+- the path names, each the index of a string in the string table,
+used by the keys and by the values that are paths.
+- the numbers of the packed lists.
+- the string table, with every name and string literal saved once,
+sorted, so that the indexes of the names are sorted like the names,
+and the keys can be compared by the indexes of their names.
+"""
+
+import mmap
+import struct
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from mesh import Mesh, hidden
+
+magic = b'NYS\0'
+
+# Increase this every time the format of the file changes
+version = 1
+
+header = struct.Struct('<4sIIIII')
+record = struct.Struct('<IIIq')
+offset = struct.Struct('<I')
+
+# The kinds of values in the records
+NONE, PATH, NUMBER, BIG, STRING, LIST = range(6)
+
+def dump(mesh: Mesh, path: str, root: Optional[Tuple[str]] = None):
+	"""
+	This function saves a snapshot of the mesh to the file at
+	path. If root is given, the keys of the program written in
+	it are evaluated first, see evaluate, so that their values
+	are in the snapshot even if nothing has needed them yet.
+	Every key of the mesh is then saved, with its value resolved,
+	see resolve, apart from the ones whose value is a path that's
+	not saved, as it could not be looked up. The keys that are
+	only shown by overlays are not saved, as they're copies of
+	definitions that nothing has evaluated, but they're followed
+	to resolve the values.
+	"""
+	with open(path, 'wb') as file:
+		file.write(dumps(mesh, root))
+
+def dumps(mesh: Mesh, root: Optional[Tuple[str]] = None) -> bytes:
+	"This function returns the content of the snapshot of a mesh, see dump."
+	if root is not None:
+		evaluate(mesh, root)
+	resolved = {key: resolve(mesh, key) for key in mesh}
+	resolved = {key: value for key, value in resolved.items()
+				if not isinstance(value, tuple) or value in resolved}
+	strings = {name for key in resolved for name in key}
+	for value in resolved.values():
+		if isinstance(value, tuple):
+			strings.update(value)
+		elif isinstance(value, str):
+			strings.add(value)
+		elif isinstance(value, int) and not -1 << 63 <= value < 1 << 63:
+			strings.add(str(value))
+	table = sorted(strings)
+	index = {string: i for i, string in enumerate(table)}
+	keys = sorted(resolved, key=lambda key: [index[name] for name in key])
+
+	names: List[int] = []
+	# Where each path is in the names, as keys and values are often the same
+	paths: Dict[Tuple[str], int] = {}
+	numbers: List[int] = []
+	def place(path):
+		if not path in paths:
+			paths[path] = len(names)
+			names.extend(index[name] for name in path)
+		return paths[path]
+	records = []
+	for key in keys:
+		value = resolved[key]
+		if value is None:
+			kind, data = NONE, 0
+		elif isinstance(value, tuple):
+			kind, data = PATH, place(value) | len(value) << 32
+		elif isinstance(value, int) and -1 << 63 <= value < 1 << 63:
+			kind, data = NUMBER, value
+		elif isinstance(value, int):
+			kind, data = BIG, index[str(value)]
+		elif isinstance(value, str):
+			kind, data = STRING, index[value]
+		else:
+			kind, data = LIST, len(numbers) | len(value) << 32
+			numbers.extend(value)
+		records.append(record.pack(place(key), len(key), kind, data))
+
+	encoded = [string.encode() for string in table]
+	offsets, total = [], 0
+	for string in encoded:
+		offsets.append(total)
+		total += len(string)
+	offsets.append(total)
+	data = [header.pack(magic, version, len(table), len(names), len(records),
+						len(numbers))]
+	data.extend(offset.pack(start) for start in offsets)
+	data.extend(records)
+	data.append(struct.pack(f'<{len(names)}I', *names))
+	size = sum(map(len, data))
+	# The numbers are aligned, so that they can be cast to 'q'
+	data.append(bytes(-size % 8))
+	data.append(struct.pack(f'<{len(numbers)}q', *numbers))
+	data.extend(encoded)
+	return b''.join(data)
+
+def evaluate(mesh: Mesh, root: Tuple[str]):
+	"""
+	This function looks for the value of every key that starts
+	with root and is not inside a call, under Mesh.limits. The
+	keys whose value can't be found, like the value of a
+	definition whose arguments aren't given, are skipped.
+
+	>>> import stdlib
+	>>> m = stdlib.program('k: (x: 5, y: + x 1)', ('base', 's'))
+	>>> resolve(m, ('base', 's', 'k', 'y'))
+	('base', 's', 'k', 'y', '3.', 'self')
+	>>> evaluate(m, ('base', 's'))
+	>>> resolve(m, ('base', 's', 'k', 'y'))
+	6
+	"""
+	for key in [*mesh.subtree(root, hidden)]:
+		try:
+			mesh.valueof(key)
+		except (SyntaxError, ValueError):
+			pass
+
+def resolve(mesh: Mesh, key: Tuple[str]):
+	"""
+	This function returns the value of key that's saved in the
+	snapshot of mesh: the number, the list of numbers or the
+	string it is, if Mesh.number, Mesh.packed or Mesh.string
+	can find it, otherwise its
+	value, following the paths while they are in the mesh, until
+	a definition or a literal is found, like Mesh.valueof would.
+	Paths that aren't in the mesh, as nothing has ever needed
+	them, are saved as they are.
+
+	>>> m = Mesh({('a',): None, ('b',): ('a',), ('c',): ('b',),
+	...           ('d',): ('c', 'x'), ('e',): ('f',), ('f',): 'hi',
+	...           ('g',): ('base', 'nat', 'pos'), ('g', 'prev'): 2})
+	>>> [resolve(m, key) for key in [('a',), ('c',), ('d',), ('e',), ('g',)]]
+	[None, ('a',), ('c', 'x'), 'hi', 3]
+	"""
+	value, seen = mesh[key], {key}
+	if value is not None:
+		for found in (mesh.number(key), mesh.packed(key), mesh.string(key)):
+			if found is not None:
+				return found
+	while isinstance(value, tuple) and value in mesh and not value in seen:
+		seen.add(value)
+		if mesh[value] is None:
+			break
+		value = mesh[value]
+	return value
+
+
+class Snapshot:
+	"""
+	A snapshot file, opened to look up the values of its paths.
+	Nothing is read until it's needed: a path is found with a
+	binary search of the indexes of its names in the string
+	table, and then with a binary search of the records.
+	The values are None, paths, ints, strs and memoryviews of
+	packed lists, like in a mesh, and the memoryviews are read
+	from the file without being copied, so the snapshot can't be
+	closed while they're used.
+
+	>>> import os, tempfile
+	>>> from array import array
+	>>> m = Mesh({('a',): None, ('a', 'n'): 1 << 70, ('b',): ('a',),
+	...           ('c',): ('b',), ('d',): 'hi', ('e',): -4,
+	...           ('l',): memoryview(array('q', [1, 2]))})
+	>>> m.add(('f',), ('a',), ((('a',), ('f',)),))
+	>>> m[('f', 'x')] = ('f', 'n')
+	>>> path = os.path.join(tempfile.mkdtemp(), 'x.nys')
+	>>> dump(m, path)
+	>>> with Snapshot(path) as snapshot:
+	...     len(snapshot), snapshot[('c',)], snapshot.valueof(('a',))
+	...     snapshot[('f', 'x')], snapshot[('d',)], snapshot[('e',)]
+	...     snapshot[('l',)].tolist(), ('x',) in snapshot
+	(9, ('a',), ('a',))
+	(1180591620717411303424, 'hi', -4)
+	([1, 2], False)
+
+	The values a program computes can be looked up too.
+	>>> import stdlib
+	>>> m = stdlib.program('k: (x: 5, y: + x 1, z: "hi")', ('base', 's'))
+	>>> dump(m, path, ('base', 's'))
+	>>> with Snapshot(path) as snapshot:
+	...     snapshot.valueof(('base', 's', 'k', 'y'))
+	...     snapshot.valueof(('base', 's', 'k', 'z'))
+	6
+	'hi'
+	"""
+
+	# Public:
+
+	def __init__(self, path: str):
+		"Opens the snapshot at path."
+		with open(path, 'rb') as file:
+			self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		start, made, self.strings, names, self.records, numbers = \
+			header.unpack_from(self.data)
+		if start != magic or made != version:
+			self.data.close()
+			raise ValueError(f'{path!r} is not a snapshot of this version.')
+		self.offsets = header.size
+		self.start = self.offsets + offset.size * (self.strings + 1)
+		self.names = self.start + record.size * self.records
+		self.numbers = self.names + offset.size * names
+		self.numbers += -self.numbers % 8
+		self.table = self.numbers + 8 * numbers
+
+	def __enter__(self) -> 'Snapshot':
+		return self
+
+	def __exit__(self, *exception):
+		self.close()
+
+	def close(self):
+		"Closes the file of the snapshot."
+		self.data.close()
+
+	def __len__(self) -> int:
+		return self.records
+
+	def __contains__(self, key: Tuple[str]) -> bool:
+		return self.find(key) is not None
+
+	def __getitem__(self, key: Tuple[str]):
+		found = self.find(key)
+		if found is None:
+			raise KeyError(key)
+		_, _, kind, data = record.unpack_from(self.data,
+			self.start + record.size * found)
+		if kind == NONE:
+			return None
+		if kind == PATH:
+			return tuple(map(self.string, self.path(data & 0xffffffff, data >> 32)))
+		if kind == NUMBER:
+			return data
+		if kind == BIG:
+			return int(self.string(data))
+		if kind == STRING:
+			return self.string(data)
+		start = self.numbers + 8 * (data & 0xffffffff)
+		return memoryview(self.data)[start:start+8*(data >> 32)].cast('q')
+
+	def get(self, key: Tuple[str], default=None):
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+	def valueof(self, path: Tuple[str]):
+		"""
+		This method returns the value of path, like Mesh.valueof
+		would: the path itself if it's a definition, the path of
+		the definition it is otherwise, or a literal. The values
+		are resolved when the snapshot is made, so this is just a
+		lookup, and a path that's not in the snapshot can't be
+		found by cloning anything, so it raises a KeyError.
+		"""
+		value = self[path]
+		return path if value is None else value
+
+	# Private:
+
+	def string(self, i: int) -> str:
+		"This method returns the string at index i of the string table."
+		return self.bytes(i).decode()
+
+	def path(self, start: int, length: int) -> Tuple[int, ...]:
+		"This method returns the indexes of the names of a path."
+		return struct.unpack_from(f'<{length}I', self.data,
+								  self.names + offset.size * start)
+
+	def find(self, key: Tuple[str]):
+		"""
+		This method returns the index of the record of key,
+		or None if it's not in the snapshot.
+		"""
+		encoded = []
+		for name in key:
+			data = name.encode()
+			i = bisect_left(range(self.strings), data, key=self.bytes)
+			if i == self.strings or self.bytes(i) != data:
+				return None
+			encoded.append(i)
+		target = tuple(encoded)
+		i = bisect_left(range(self.records), target, key=self.key)
+		if i == self.records or self.key(i) != target:
+			return None
+		return i
+
+	def bytes(self, i: int) -> bytes:
+		"This method returns the encoded string at index i."
+		start, end = struct.unpack_from('<II', self.data,
+										self.offsets + offset.size * i)
+		return self.data[self.table+start:self.table+end]
+
+	def key(self, i: int) -> Tuple[int, ...]:
+		"This method returns the indexes of the names of the key of record i."
+		start, length, _, _ = record.unpack_from(self.data,
+			self.start + record.size * i)
+		return self.path(start, length)
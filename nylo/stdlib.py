@@ -0,0 +1,167 @@
+"""
+This module loads the standard library, std/base.ny. Parsing and
+binding it gives always the same mesh, so the result is saved in
+a compiled file next to it, base.nyc, and loaded from there the
+next times. The compiled file is rebuilt whenever the source, the
+modules that make the mesh or the version of python change.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from contextlib import nullcontext
+from itertools import chain
+from typing import (Callable, ContextManager, Iterable, Optional, Tuple,
+					Union)
+from code import Code
+from mesh import Mesh
+from parser import Parser
+
+magic = b'NYC\0'
+
+here = os.path.dirname(os.path.abspath(__file__))
+base = os.path.join(here, '..', 'std', 'base.ny')
+
+# The modules the mesh is made with: the compiled file is keyed by
+# their code, so that it's rebuilt when they change
+modules = ('code', 'lexer', 'mesh', 'parser')
+
+def load(path: str = base) -> Mesh:
+	"""
+	This function returns the parsed and binded mesh of the
+	standard library at the given path. It's read from the
+	compiled file if it's up to date, otherwise the library
+	is parsed, binded, and the compiled file is written.
+	If the compiled file can't be written, the mesh is just
+	returned.
+
+	>>> m = load()
+	>>> m[('base', 'fib', 'n')]
+	('base', 'nat')
+	>>> m == load()
+	True
+	"""
+	with open(path, 'rb') as file:
+		source = file.read()
+	key = hashlib.sha256(source + sys.version.encode())
+	for module in modules:
+		with open(os.path.join(here, module + '.py'), 'rb') as file:
+			key.update(file.read())
+	compiled = os.path.splitext(path)[0] + '.nyc'
+	try:
+		with open(compiled, 'rb') as file:
+			return loads(file.read(), key.digest())
+	except (OSError, ValueError, EOFError, TypeError):
+		pass
+	parser = Parser(Code(chain('(', [source.decode()], ')')))
+	parser.parse(('base',))
+	parser.mesh.bind()
+	# Each run writes its own temporary file, so that runs at the
+	# same time never write on the same one.
+	try:
+		handle, temporary = tempfile.mkstemp(
+			dir=os.path.dirname(compiled), suffix='.nyc.tmp')
+	except OSError:
+		return parser.mesh
+	try:
+		with os.fdopen(handle, 'wb') as file:
+			file.write(dumps(parser.mesh, key.digest()))
+		os.replace(temporary, compiled)
+	except OSError:
+		try:
+			os.remove(temporary)
+		except OSError:
+			pass
+	return parser.mesh
+
+def program(code: Union[str, Iterable[str]], root: Tuple[str],
+			std: Optional[Mesh] = None,
+			phase: Callable[[str], ContextManager] = lambda name: nullcontext()
+			) -> Mesh:
+	"""
+	This function returns the mesh of a program, parsed in root
+	and binded together with the standard library, std, that's
+	loaded if it's not given. The code is given like to Code,
+	without the parentheses around it. Parsing and binding are
+	each done in the context returned by phase for their name,
+	e.g. Profile.phase. The root can't have any of the keys of
+	std inside it, as they would be mixed with the program's.
+
+	>>> m = program('a: 1, -> a', ('base', 'x'))
+	>>> m[('base', 'x', 'self')], m[('base', 'fib', 'n')]
+	(('base', 'x', 'a'), ('base', 'nat'))
+
+	The calls in the paths of errors show what they call.
+	>>> program('-> + 1 len(of: d)', ('base', 'x'))
+	Traceback (most recent call last):
+		...
+	SyntaxError: Name 'd' is not defined in ('base', 'x', 'self', '1.+', 'args', 'next', 'value', '3.len', 'of').
+	>>> program('-> 5', ('base', 'len'))
+	Traceback (most recent call last):
+		...
+	ValueError: ('base', 'len') is already used by the standard library.
+	"""
+	if isinstance(code, str):
+		code = (code,)
+	if std is None:
+		std = load()
+	if used(root, std):
+		raise ValueError(f'{root!r} is already used by the standard library.')
+	with phase('parse'):
+		parser = Parser(Code(chain('(', code, ')')))
+		parser.parse(root)
+	with phase('bind'):
+		parsed = [key for key in parser.mesh if key not in std]
+		parser.mesh.update(std)
+		parser.mesh.bind(parsed)
+	return parser.mesh
+
+def used(root: Tuple[str], std: Mesh) -> bool:
+	"""
+	This function checks if a program can't be parsed in root,
+	because std has keys inside it.
+
+	>>> std = Mesh({('base', 'len'): None, ('base', 'len', 'of'): None})
+	>>> used(('base', 'len'), std), used(('base', 'zz'), std)
+	(True, False)
+	"""
+	return any(key[:len(root)] == root for key in std)
+
+def dumps(mesh: Mesh, key: bytes) -> bytes:
+	"""
+	This function returns the compiled file of a mesh. It starts
+	with a magic number and the key the mesh has been compiled
+	with, followed by the marshalled keys and values. Packed lists
+	are saved as the bytes of their numbers.
+
+	>>> m = Mesh({('a',): None, ('b',): ('a',), ('c',): 'hi'})
+	>>> loads(dumps(m, b'key'), b'key') == m
+	True
+	>>> loads(dumps(m, b'key'), b'other')
+	Traceback (most recent call last):
+		...
+	ValueError: The compiled file is out of date.
+	"""
+	values = tuple(value.tobytes() if isinstance(value, memoryview)
+				   else value for value in mesh.values())
+	return magic + key + marshal.dumps((tuple(mesh), values))
+
+def loads(data: bytes, key: bytes) -> Mesh:
+	"""
+	This function reads a compiled file made by dumps, checking
+	that it's been compiled with the given key. Packed lists are
+	read as memoryviews of their bytes, without being copied.
+
+	>>> from array import array
+	>>> m = Mesh({('l',): memoryview(array('q', [1, 2]))})
+	>>> loads(dumps(m, b'key'), b'key')[('l',)].tolist()
+	[1, 2]
+	"""
+	header = magic + key
+	if data[:len(header)] != header:
+		raise ValueError('The compiled file is out of date.')
+	keys, values = marshal.loads(memoryview(data)[len(header):])
+	return Mesh(zip(keys, (memoryview(value).cast('q')
+		if isinstance(value, bytes) else value for value in values)))
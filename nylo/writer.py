@@ -68,6 +68,9 @@ class Writer:
 		a string containing the number of previous it found.
 		The n argument is beginning value. natural.zero with
 		n=0 will be 0, natural.zero with n=10 will be 10.
+		If a number that's still saved as an int is found,
+		or one that Mesh.number can find without cloning
+		anything, it's just added to the previous found.
 		
 		>>> w = Writer(Mesh({
 		... ('base', 'nat', 'pos'): None,
@@ -87,6 +90,15 @@ class Writer:
 		>>> w.natural(('n',))
 		'0'
 		
+		>>> w = Writer(Mesh({
+		... ('base', 'nat', 'pos'): None,
+		... ('base', 'nat', 'zero'): None,
+		... ('n',): ('base', 'nat', 'pos'),
+		... ('n', 'prev'): 4201336,
+		... }))
+		>>> w.natural(('n',))
+		'4201337'
+		
 		>>> w = Writer(Mesh({
 		... ('base', 'nat', 'pos'): None,
 		... ('base', 'nat', 'zero'): None,
@@ -105,6 +117,11 @@ class Writer:
 			if self.mesh.valueof(value) != ('base', 'nat', 'pos'):
 				nan = self.write(self.mesh.valueof(value))
 				raise ValueError(f'{nan!r} found in a number.')
+			number = self.mesh.number(value)
+			if number is not None:
+				return str(n + number)
+			if isinstance(self.mesh.get(value+('prev',)), int):
+				return str(n + 1 + self.mesh[value+('prev',)])
 			value += ('prev',)
 			n += 1
 		return str(n)
@@ -113,6 +130,8 @@ class Writer:
 		"""
 		This writer will represent the linked list. It will
 		print the 'value' and then proceed to the 'next' node.
+		If the rest is a list of numbers that Mesh.packed can
+		find without cloning anything, it's written as it is.
 		
 		>>> w = Writer(Mesh({
 		... ('base', 'list', 'element'): None,
@@ -167,17 +186,35 @@ class Writer:
 			if self.mesh.valueof(value) != ('base', 'list', 'element'):
 				nal = self.write(self.mesh.valueof(value))
 				raise ValueError(f'{nal!r} found in a list.')
+			packed = self.mesh.packed(value)
+			if packed is not None:
+				elements.extend(map(str, packed))
+				break
 			elements.append(self.write(value+('value',)))
 			value += ('next',)
+			# The rest is a packed list of numbers
+			if isinstance(self.mesh.get(value), memoryview):
+				elements.extend(map(str, self.mesh[value]))
+				break
 		return f'[{" ".join(elements)}]'
 	
 	def string(self, value: Tuple[str]):
 		"""
 		This writer will represent a string. It will do so
 		by getting the represented list of character, and
-		then mapping chr over them. This is quite ugly, but
-		right now it should work well enough.
+		then mapping chr over them. If the characters are 
+		still a packed list of numbers, they are used directly.
+		
+		>>> w = Writer(Mesh({
+		... ('base', 'string'): None,
+		... ('s',): 'hello',
+		... }))
+		>>> w.write(('s',))
+		'hello'
 		"""
+		characters = self.mesh.get(value+('characters',))
+		if isinstance(characters, memoryview) and characters:
+			return ''.join(map(chr, characters))
 		if self.mesh.valueof(value+('characters',)) != ('base', 'list', 'element'):
 			return 'base.string'
 		elements = self.wlist(value+('characters',))